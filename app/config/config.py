@@ -3,6 +3,8 @@ from pathlib import Path
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from ..constants.enums import StorageBackend
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file="app/.env", env_file_encoding="utf-8")
@@ -15,6 +17,26 @@ class Settings(BaseSettings):
     banner_images_storage_path: Path
     avatar_images_storage_path: Path
     theme_colors: list[str]
+    storage_backend: StorageBackend = StorageBackend.MEMORY
+    storage_path: Path = Path("app/storage")
+    storage_snapshot_interval: int = 10000
+    storage_conflict_retries: int = 3
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536
+    argon2_parallelism: int = 4
+    password_hashing_workers: int = 2
+    password_hashing_queue_size: int = 32
+    password_hashing_timeout: float = 10
+    token_cache_size: int = 10000
+    token_cache_ttl: int = 300
+    attachment_max_size: int = 1073741824
+    attachment_chunk_size: int = 1048576
+    avatar_cache_size: int = 1024
+    avatar_prerender_workers: int = 0
+    classroom_summary_upcoming_items: int = 3
+    due_tasks_window_days: int = 7
+    bulk_max_rows: int = 1000
+    export_chunk_size: int = 65536
 
 
 @lru_cache()
@@ -15,3 +15,12 @@ class TaskStatus(Enum):
     ASSIGNED = "Assigned"
     TURNED_IN = "TurnedIn"
     GRADED = "Graded"
+
+class StorageBackend(Enum):
+    MEMORY = "memory"
+    LOG = "log"
+    SQLITE = "sqlite"
+
+class GradebookFormat(Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
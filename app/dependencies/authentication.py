@@ -1,5 +1,8 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Annotated
+from time import time
+from typing import Annotated, Callable, TypeVar
 
 import jwt
 from argon2 import PasswordHasher
@@ -9,11 +12,27 @@ from fastapi.security import OAuth2PasswordBearer
 
 from ..config.config import get_settings
 from ..internal.controller import controller
+from ..internal.token_cache import TokenCache
 from ..internal.user import User
 
 settings = get_settings()
 
-password_hasher = PasswordHasher()
+password_hasher = PasswordHasher(
+    time_cost=settings.argon2_time_cost,
+    memory_cost=settings.argon2_memory_cost,
+    parallelism=settings.argon2_parallelism,
+)
+
+password_hashing_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hashing_workers,
+    thread_name_prefix="password-hashing",
+)
+
+password_hashing_slots = asyncio.Semaphore(settings.password_hashing_queue_size)
+
+token_cache = TokenCache(settings.token_cache_size, settings.token_cache_ttl)
+
+T = TypeVar("T")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -23,8 +42,29 @@ credentials_exception = HTTPException(
     headers={"WWW-Authenticate": "Bearer"},
 )
 
+busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Server is busy, please try again later",
+    headers={"Retry-After": "1"},
+)
+
+
+async def run_password_task(function: Callable[..., T], *args) -> T:
+    try:
+        await asyncio.wait_for(
+            password_hashing_slots.acquire(), settings.password_hashing_timeout
+        )
+    except TimeoutError as exc:
+        raise busy_exception from exc
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            password_hashing_executor, function, *args
+        )
+    finally:
+        password_hashing_slots.release()
+
 
-def verify_password(hashed_password: str, plain_password: str) -> bool:
+def verify_password_sync(hashed_password: str, plain_password: str) -> bool:
     try:
         password_hasher.verify(hashed_password, plain_password)
     except VerifyMismatchError:
@@ -32,8 +72,14 @@ def verify_password(hashed_password: str, plain_password: str) -> bool:
     return True
 
 
-def get_password_hash(password: str) -> str:
-    return password_hasher.hash(password)
+async def verify_password(hashed_password: str, plain_password: str) -> bool:
+    return await run_password_task(
+        verify_password_sync, hashed_password, plain_password
+    )
+
+
+async def get_password_hash(password: str) -> str:
+    return await run_password_task(password_hasher.hash, password)
 
 
 def create_access_token(data: dict) -> str:
@@ -46,18 +92,30 @@ def create_access_token(data: dict) -> str:
     return encoded_jwt
 
 
-def authenticate_user(username_or_email: str, password: str) -> User | None:
+async def authenticate_user(username_or_email: str, password: str) -> User | None:
     user = controller.get_user_by_email(
         username_or_email
     ) or controller.get_user_by_username(username_or_email)
     if user is None:
         return None
-    if not verify_password(user.hashed_password, password):
+    if not await verify_password(user.hashed_password, password):
         return None
+    if password_hasher.check_needs_rehash(user.hashed_password):
+        hashed_password = await get_password_hash(password)
+
+        def set_hashed_password() -> tuple[User]:
+            user.hashed_password = hashed_password
+            return (user,)
+
+        controller.update(set_hashed_password)
     return user
 
 
 def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> User:
+    user = token_cache.get(token)
+    if user is not None and controller.get_user_by_id(user.id) is user:
+        return user
+
     try:
         payload = jwt.decode(
             token, settings.jwt_secret_key, algorithms=[settings.algorithm]
@@ -66,10 +124,12 @@ def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> User:
         if not isinstance(user_id_payload, str):
             raise credentials_exception
         user_id: str = user_id_payload
+        expire: float = payload.get("exp", time())
     except Exception as exc:
         raise credentials_exception from exc
 
     user = controller.get_user_by_id(user_id)
     if user is None:
         raise credentials_exception
+    token_cache.put(token, user, expire)
     return user
@@ -0,0 +1,6 @@
+class AttachmentTooLarge(Exception):
+    pass
+
+
+class AttachmentInUse(Exception):
+    pass
@@ -0,0 +1,10 @@
+class StorageOutOfSync(Exception):
+    pass
+
+
+class UnsupportedStorageFormat(Exception):
+    pass
+
+
+class StorageConflict(Exception):
+    pass
@@ -0,0 +1,52 @@
+import csv
+import os
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from .config.config import get_settings
+from .constants.enums import StorageBackend
+from .dependencies.authentication import password_hasher
+from .exceptions.user import EmailAlreadyInUse, UsernameAlreadyInUse
+from .internal.controller import controller
+
+settings = get_settings()
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Create users from a CSV file with username, email and password"
+        " columns"
+    )
+    parser.add_argument("path")
+    args = parser.parse_args()
+    if settings.storage_backend == StorageBackend.MEMORY:
+        sys.exit("Importing users requires the log or sqlite storage backend")
+    with open(args.path, newline="", encoding="utf-8") as input_file:
+        rows = list(csv.DictReader(input_file))
+    started_at = perf_counter()
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        password_hashes = list(
+            executor.map(password_hasher.hash, [row["password"] for row in rows])
+        )
+    elapsed = perf_counter() - started_at
+    try:
+        users = controller.create_users(
+            [
+                (row["username"], row["email"], password_hash)
+                for row, password_hash in zip(rows, password_hashes)
+            ]
+        )
+    except (EmailAlreadyInUse, UsernameAlreadyInUse) as exp:
+        sys.exit(str(exp))
+    finally:
+        controller.close()
+    print(
+        f"Imported {len(users)} users, hashed {len(rows) / elapsed:.1f} passwords"
+        " per second"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,39 @@
-import os
-from io import BytesIO
-from typing import BinaryIO
+import sys
 from uuid import uuid4
 
-from ..config.config import get_settings
+from .blob_store import blob_store
 from .user import User
 
-settings = get_settings()
-
 
 class Attachment:
+    __slots__ = (
+        "__id",
+        "__original_filename",
+        "__content_type",
+        "__owner",
+        "__checksum",
+        "__size",
+        "__deleted",
+    )
+
     def __init__(
         self,
         original_filename: str,
         content_type: str,
-        data: BinaryIO,
         owner: User,
+        checksum: str,
+        size: int,
     ) -> None:
         self.__id: str = str(uuid4())
         self.__original_filename: str = original_filename
-        self.__content_type: str = content_type
+        self.__content_type: str = sys.intern(content_type)
         self.__owner: User = owner
-        with open(self.__get_path(), "wb") as output_file:
-            data.seek(0)
-            self.__size: int = output_file.write(data.read())
+        self.__checksum: str = sys.intern(checksum)
+        self.__size: int = size
+        self.__deleted: bool = False
 
     def __get_path(self) -> str:
-        return os.path.join(settings.attachments_storage_path, self.__id)
+        return blob_store.get_path(self.__checksum)
 
     @property
     def id(self) -> str:
@@ -40,11 +47,6 @@ class Attachment:
     def content_type(self) -> str:
         return self.__content_type
 
-    @property
-    def data(self) -> BytesIO:
-        with open(self.__get_path(), "rb") as input_file:
-            return BytesIO(input_file.read())
-
     @property
     def path(self) -> str:
         return self.__get_path()
@@ -53,6 +55,22 @@ class Attachment:
     def owner(self) -> User:
         return self.__owner
 
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    @property
+    def checksum(self) -> str:
+        return self.__checksum
+
+    @property
+    def deleted(self) -> bool:
+        return self.__deleted
+
+    @deleted.setter
+    def deleted(self, deleted: bool) -> None:
+        self.__deleted = deleted
+
     def to_dict(self) -> dict:
         return {
             "id": self.__id,
@@ -1,9 +1,13 @@
+import fcntl
 import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from hashlib import sha1
-from io import BytesIO
+from threading import Event, Lock
 from uuid import uuid4
 
 import pydenticon
+from starlette.concurrency import run_in_threadpool
 
 from ..config.config import get_settings
 
@@ -22,7 +26,17 @@ IDENTICON_FORGROUND_COLORS = [
 
 IDENTICON_BACKGROUND_COLOR = "rgb(224,224,224)"
 
-IDENTICON_PADDING = (24, 24, 24, 24)
+IDENTICON_PADDING_RATIO = 24 / 304
+
+AVATAR_SIZES = (32, 64, 128, 256, 304)
+
+AVATAR_FULL_SIZE = 304
+
+AVATAR_CONTENT_TYPE = "image/png"
+
+AVATAR_PRERENDER_CHUNK_SIZE = 64
+
+AVATAR_PRERENDER_LOCK_FILENAME = ".prerender.lock"
 
 identicon_generator = pydenticon.Generator(
     rows=5,
@@ -33,18 +47,89 @@ identicon_generator = pydenticon.Generator(
 )
 
 
+def get_avatar_path(avatar_id: str, size: int = AVATAR_FULL_SIZE) -> str:
+    return os.path.join(settings.avatar_images_storage_path, f"{avatar_id}-{size}")
+
+
+def render_identicon(avatar_id: str, size: int = AVATAR_FULL_SIZE) -> bytes:
+    padding = round(size * IDENTICON_PADDING_RATIO)
+    return identicon_generator.generate(
+        avatar_id,
+        size - 2 * padding,
+        size - 2 * padding,
+        padding=(padding, padding, padding, padding),
+        output_format="png",
+    )  # type: ignore
+
+
+def write_identicon(avatar_id: str, size: int, data: bytes) -> None:
+    path = get_avatar_path(avatar_id, size)
+    temporary_path = f"{path}.{uuid4()}.tmp"
+    with open(temporary_path, "wb") as output_file:
+        output_file.write(data)
+    os.replace(temporary_path, path)
+
+
+def read_identicon(avatar_id: str, size: int) -> bytes | None:
+    try:
+        with open(get_avatar_path(avatar_id, size), "rb") as input_file:
+            return input_file.read()
+    except FileNotFoundError:
+        return None
+
+
+def load_identicon(avatar_id: str, size: int) -> bytes:
+    data = read_identicon(avatar_id, size)
+    if data is None:
+        data = render_identicon(avatar_id, size)
+        write_identicon(avatar_id, size, data)
+    return data
+
+
+def prerender_identicon(avatar_id: str) -> None:
+    for size in AVATAR_SIZES:
+        if not os.path.exists(get_avatar_path(avatar_id, size)):
+            write_identicon(avatar_id, size, render_identicon(avatar_id, size))
+
+
+def prerender_identicons(avatar_ids: list[str]) -> int:
+    for avatar_id in avatar_ids:
+        prerender_identicon(avatar_id)
+    return len(avatar_ids)
+
+
+class AvatarCache:
+    def __init__(self, max_size: int) -> None:
+        self.__max_size: int = max_size
+        self.__entries: OrderedDict[tuple[str, int], bytes] = OrderedDict()
+        self.__lock: Lock = Lock()
+
+    def get(self, avatar_id: str, size: int) -> bytes | None:
+        with self.__lock:
+            data = self.__entries.get((avatar_id, size))
+            if data is not None:
+                self.__entries.move_to_end((avatar_id, size))
+            return data
+
+    def put(self, avatar_id: str, size: int, data: bytes) -> None:
+        with self.__lock:
+            self.__entries[(avatar_id, size)] = data
+            self.__entries.move_to_end((avatar_id, size))
+            if len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+
+
+avatar_cache = AvatarCache(settings.avatar_cache_size)
+
+
 class Avatar:
+    __slots__ = ("__id",)
+
     def __init__(self) -> None:
         self.__id: str = str(uuid4())
-        identicon = identicon_generator.generate(
-            self.__id, 256, 256, padding=IDENTICON_PADDING, output_format="png"
-        )
-        self.__content_type: str = "image/png"
-        with open(self.__get_path(), "wb") as output_file:
-            self.__size: int = output_file.write(identicon)  # type: ignore
 
     def __get_path(self) -> str:
-        return os.path.join(settings.avatar_images_storage_path, self.__id)
+        return get_avatar_path(self.__id)
 
     @property
     def id(self) -> str:
@@ -52,20 +137,52 @@ class Avatar:
 
     @property
     def content_type(self) -> str:
-        return self.__content_type
-
-    @property
-    def data(self) -> BytesIO:
-        with open(self.__get_path(), "rb") as input_file:
-            return BytesIO(input_file.read())
+        return AVATAR_CONTENT_TYPE
 
     @property
     def path(self) -> str:
         return self.__get_path()
 
+    def get_etag(self, size: int = AVATAR_FULL_SIZE) -> str:
+        return f"{self.__id}-{size}"
+
+    async def get_data(self, size: int = AVATAR_FULL_SIZE) -> bytes:
+        data = avatar_cache.get(self.__id, size)
+        if data is None:
+            data = await run_in_threadpool(load_identicon, self.__id, size)
+            avatar_cache.put(self.__id, size, data)
+        return data
+
     def to_dict(self) -> dict:
         return {
             "id": self.__id,
-            "content_type": self.__content_type,
-            "size": self.__size,
+            "content_type": AVATAR_CONTENT_TYPE,
         }
+
+
+def prerender_avatars(
+    avatar_ids: list[str], max_workers: int | None, stop_event: Event
+) -> int:
+    count = 0
+    lock_path = os.path.join(
+        settings.avatar_images_storage_path, AVATAR_PRERENDER_LOCK_FILENAME
+    )
+    with open(lock_path, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return count
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(prerender_identicons, chunk): chunk
+                for chunk in (
+                    avatar_ids[start : start + AVATAR_PRERENDER_CHUNK_SIZE]
+                    for start in range(0, len(avatar_ids), AVATAR_PRERENDER_CHUNK_SIZE)
+                )
+            }
+            for future in as_completed(futures):
+                count += future.result()
+                if stop_event.is_set():
+                    executor.shutdown(cancel_futures=True)
+                    break
+    return count
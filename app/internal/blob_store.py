@@ -0,0 +1,111 @@
+import fcntl
+import os
+from contextlib import contextmanager
+from hashlib import sha256
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Iterator
+from uuid import uuid4
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from ..config.config import get_settings
+from ..exceptions.attachment import AttachmentTooLarge
+
+settings = get_settings()
+
+BLOB_LOCK_FILENAME = ".lock"
+
+
+class BlobStore:
+    def __init__(self, path: Path) -> None:
+        self.__path: Path = path
+        self.__reference_counts: dict[str, int] = {}
+        self.__lock: Lock = Lock()
+
+    def get_path(self, checksum: str) -> str:
+        return os.path.join(self.__path, checksum[:2], checksum)
+
+    @contextmanager
+    def __locked(self) -> Iterator[None]:
+        with self.__lock:
+            with open(os.path.join(self.__path, BLOB_LOCK_FILENAME), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+
+    async def write(self, data: UploadFile) -> tuple[str, str, int]:
+        if data.size is not None and data.size > settings.attachment_max_size:
+            raise AttachmentTooLarge("Attachment is too large")
+        checksum = sha256()
+        size = 0
+        temporary_path = os.path.join(self.__path, f".upload-{uuid4()}")
+        await data.seek(0)
+        output_file = await run_in_threadpool(open, temporary_path, "wb")
+        try:
+            while chunk := await data.read(settings.attachment_chunk_size):
+                size += len(chunk)
+                if size > settings.attachment_max_size:
+                    raise AttachmentTooLarge("Attachment is too large")
+                checksum.update(chunk)
+                await run_in_threadpool(output_file.write, chunk)
+            await run_in_threadpool(output_file.close)
+        except BaseException:
+            await run_in_threadpool(output_file.close)
+            if os.path.exists(temporary_path):
+                await run_in_threadpool(os.remove, temporary_path)
+            raise
+        return temporary_path, checksum.hexdigest(), size
+
+    @contextmanager
+    def commit(
+        self,
+        temporary_path: str,
+        checksum: str,
+        is_referenced: Callable[[str], bool],
+    ) -> Iterator[None]:
+        blob_path = self.get_path(checksum)
+        with self.__locked():
+            if os.path.exists(blob_path):
+                os.remove(temporary_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(temporary_path, blob_path)
+            self.__reference_counts[checksum] = (
+                self.__reference_counts.get(checksum, 0) + 1
+            )
+            try:
+                yield
+            except BaseException:
+                self.__release(checksum, is_referenced)
+                raise
+
+    def acquire(self, checksum: str) -> None:
+        with self.__lock:
+            self.__reference_counts[checksum] = (
+                self.__reference_counts.get(checksum, 0) + 1
+            )
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__reference_counts.clear()
+
+    def release(self, checksum: str, is_referenced: Callable[[str], bool]) -> None:
+        with self.__locked():
+            self.__release(checksum, is_referenced)
+
+    def __release(self, checksum: str, is_referenced: Callable[[str], bool]) -> None:
+        reference_count = self.__reference_counts.get(checksum, 0) - 1
+        if reference_count > 0:
+            self.__reference_counts[checksum] = reference_count
+            return
+        self.__reference_counts.pop(checksum, None)
+        if is_referenced(checksum):
+            return
+        try:
+            os.remove(self.get_path(checksum))
+        except FileNotFoundError:
+            pass
+
+
+blob_store = BlobStore(settings.attachments_storage_path)
@@ -1,24 +1,57 @@
+import math
 import os
 import random
+from bisect import bisect_left, insort
 from datetime import datetime
 from functools import lru_cache
+from heapq import merge
+from itertools import islice
+from typing import Iterator, TypeVar
 from uuid import uuid4
 
 from ..config.config import get_settings
+from ..constants.enums import ClassroomItemType
 from .attachment import Attachment
+from .compact import now_timestamp, to_datetime
+from .fragment_cache import fragment_cache
 from .items import (
     Announcement,
     Assignment,
     BaseItem,
+    DueDateMixin,
     Material,
     MultipleChoiceQuestion,
     Question,
+    TopicMixin,
 )
+from .json_response import dump_json, json_fragment
 from .topic import Topic
 from .user import User
 
 settings = get_settings()
 
+Entry = TypeVar("Entry", tuple[int, str], tuple[float, str])
+
+ITEM_STATE = (
+    "_Classroom__items",
+    "_Classroom__item_counter",
+    "_Classroom__item_order",
+    "_Classroom__everyone_items",
+    "_Classroom__student_items",
+    "_Classroom__item_due_dates",
+    "_Classroom__task_order",
+    "_Classroom__everyone_tasks",
+    "_Classroom__student_tasks",
+)
+
+ITEM_TYPES: dict[ClassroomItemType, type[BaseItem]] = {
+    ClassroomItemType.ANNOUNCEMENT: Announcement,
+    ClassroomItemType.MATERIAL: Material,
+    ClassroomItemType.ASSIGNMENT: Assignment,
+    ClassroomItemType.QUESTION: Question,
+    ClassroomItemType.MULTIPLE_CHOICE_QUESTION: MultipleChoiceQuestion,
+}
+
 
 @lru_cache
 def get_valid_banner_images() -> list[str]:
@@ -41,6 +74,33 @@ def get_general_banner_images() -> list[str]:
     return banner_images
 
 
+def iter_entries_before(
+    entries: list[tuple[int, str]], cursor: tuple[int, str] | None
+) -> Iterator[tuple[int, str]]:
+    end = len(entries) if cursor is None else bisect_left(entries, cursor)
+    for index in range(end - 1, -1, -1):
+        yield entries[index]
+
+
+def iter_entries_between(
+    entries: list[tuple[float, str]], start: float | None, end: float | None
+) -> Iterator[tuple[float, str]]:
+    start_index = 0 if start is None else bisect_left(entries, (start,))
+    end_index = len(entries) if end is None else bisect_left(entries, (end,))
+    for index in range(start_index, end_index):
+        yield entries[index]
+
+
+def contains_entry(entries: list[Entry], entry: Entry) -> bool:
+    index = bisect_left(entries, entry)
+    return index < len(entries) and entries[index] == entry
+
+
+def remove_entry(entries: list[Entry], entry: Entry) -> None:
+    if contains_entry(entries, entry):
+        del entries[bisect_left(entries, entry)]
+
+
 class Classroom:
     def __init__(
         self,
@@ -51,6 +111,7 @@ class Classroom:
         room: str | None,
     ) -> None:
         self.__id: str = str(uuid4())
+        self.__created_at: int = now_timestamp()
         self.__owner: User = owner
         self.__name: str = name
         self.__section: str | None = section
@@ -61,9 +122,9 @@ class Classroom:
                 "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ", k=settings.classroom_code_length
             )
         )
-        self.__students: list[User] = []
-        self.__topics: list[Topic] = []
-        self.__items: list[BaseItem] = []
+        self.__students: dict[str, User] = {}
+        self.__topics: dict[str, Topic] = {}
+        self.__reset_items()
         self.__banner_path: str = random.choice(get_general_banner_images())
         if "Honors" in self.__banner_path:
             self.__theme_color: str = settings.theme_colors[7]
@@ -86,15 +147,36 @@ class Classroom:
         else:
             self.__theme_color: str = random.choice(settings.theme_colors)
 
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for name in ITEM_STATE:
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__reset_items()
+
+    def __reset_items(self) -> None:
+        self.__items: dict[str, BaseItem] = {}
+        self.__item_counter: int = 0
+        self.__item_order: list[tuple[int, str]] = []
+        self.__everyone_items: list[tuple[int, str]] = []
+        self.__student_items: dict[str, list[tuple[int, str]]] = {}
+        self.__item_due_dates: dict[str, float] = {}
+        self.__task_order: list[tuple[float, str]] = []
+        self.__everyone_tasks: list[tuple[float, str]] = []
+        self.__student_tasks: dict[str, list[tuple[float, str]]] = {}
+
     def __contains__(self, item: User | Topic | BaseItem) -> bool:
         if item == self.__owner:
             return True
-        if item in self.__students:
-            return True
-        if item in self.__topics:
-            return True
-        if item in self.__items:
-            return True
+        if isinstance(item, User):
+            return item.id in self.__students
+        if isinstance(item, Topic):
+            return item.id in self.__topics
+        if isinstance(item, BaseItem):
+            return item.id in self.__items
         return False
 
     @property
@@ -125,17 +207,25 @@ class Classroom:
     def code(self) -> str:
         return self.__code
 
+    @property
+    def created_at(self) -> datetime:
+        return to_datetime(self.__created_at)
+
     @property
     def students(self) -> list[User]:
-        return self.__students
+        return list(self.__students.values())
+
+    @property
+    def student_count(self) -> int:
+        return len(self.__students)
 
     @property
     def topics(self) -> list[Topic]:
-        return self.__topics
+        return list(self.__topics.values())
 
     @property
     def items(self) -> list[BaseItem]:
-        return self.__items
+        return [self.__items[item_id] for _, item_id in self.__item_order]
 
     @property
     def banner_path(self) -> str:
@@ -148,96 +238,183 @@ class Classroom:
     @name.setter
     def name(self, name: str) -> None:
         self.__name = name
+        fragment_cache.invalidate(self)
 
     @section.setter
     def section(self, section: str | None) -> None:
         self.__section = section
+        fragment_cache.invalidate(self)
 
     @subject.setter
     def subject(self, subject: str | None) -> None:
         self.__subject = subject
+        fragment_cache.invalidate(self)
 
     @room.setter
     def room(self, room: str | None) -> None:
         self.__room = room
+        fragment_cache.invalidate(self)
 
     @banner_path.setter
     def banner_path(self, banner_path: str) -> None:
         if banner_path not in get_valid_banner_images():
             raise ValueError("Invalid banner path")
         self.__banner_path = banner_path
+        fragment_cache.invalidate(self)
 
     @theme_color.setter
     def theme_color(self, theme_color: str) -> None:
         if theme_color not in settings.theme_colors:
             raise ValueError("Invalid theme color")
         self.__theme_color = theme_color
+        fragment_cache.invalidate(self)
+
+    def to_dict(self, include_code: bool = False) -> dict:
+        classroom_dict = fragment_cache.get(self, "classroom")
+        if classroom_dict is None:
+            classroom_dict = fragment_cache.put(
+                self,
+                "classroom",
+                {
+                    "id": self.__id,
+                    "owner": self.__owner.to_dict(),
+                    "name": self.__name,
+                    "section": self.__section,
+                    "subject": self.__subject,
+                    "room": self.__room,
+                    "banner_path": self.__banner_path,
+                    "theme_color": self.__theme_color,
+                },
+                dependencies=[self.__owner.id],
+            )
+        classroom_dict = dict(classroom_dict)
+        if include_code:
+            classroom_dict["code"] = self.__code
+        return classroom_dict
 
-    def to_dict(
+    def to_json(
         self,
         include_code: bool = False,
         include_lists: bool = False,
         filter_item_for_user: User | None = None,
-    ) -> dict:
-        classroom_dict: dict = {
-            "id": self.__id,
-            "owner": self.__owner.to_dict(),
-            "name": self.__name,
-            "section": self.__section,
-            "subject": self.__subject,
-            "room": self.__room,
-            "banner_path": self.__banner_path,
-            "theme_color": self.__theme_color,
-        }
-        if include_code:
-            classroom_dict["code"] = self.__code
-
+    ) -> bytes:
+        classroom_dict = self.to_dict(include_code)
         if include_lists:
-            classroom_dict["students"] = [
-                student.to_dict() for student in self.__students
+            students = fragment_cache.get(self, "students")
+            if students is None:
+                students = fragment_cache.put(
+                    self,
+                    "students",
+                    json_fragment(
+                        [student.to_dict() for student in self.__students.values()]
+                    ),
+                    dependencies=self.__students.keys(),
+                )
+            topics = fragment_cache.get(self, "topics")
+            if topics is None:
+                topics = fragment_cache.put(
+                    self,
+                    "topics",
+                    json_fragment(
+                        [topic.to_dict() for topic in reversed(self.__topics.values())]
+                    ),
+                )
+            classroom_dict["students"] = students
+            classroom_dict["topics"] = topics
+            classroom_dict["items"] = [
+                item.to_json()
+                for _, item in self.__iter_visible_items(filter_item_for_user)
             ]
-            topics = self.__topics.copy()
-            topics.reverse()
-            classroom_dict["topics"] = [topic.to_dict() for topic in topics]
-            if filter_item_for_user and filter_item_for_user != self.__owner:
-                items = self.__items.copy()
-                items.reverse()
-                classroom_dict["items"] = [
-                    item.to_dict()
-                    for item in items
-                    if item.assigned_to_students is None
-                    or filter_item_for_user in item.assigned_to_students
-                ]
-            else:
-                items = self.__items.copy()
-                items.reverse()
-                classroom_dict["items"] = [item.to_dict() for item in items]
-
-        return classroom_dict
+        return dump_json(classroom_dict)
+
+    def to_summary_dict(self, filter_item_for_user: User | None = None) -> dict:
+        summary_dict = self.to_dict()
+        summary_dict["student_count"] = self.student_count
+        summary_dict["topic_count"] = len(self.__topics)
+        summary_dict["item_count"] = self.get_visible_item_count(filter_item_for_user)
+        summary_dict["upcoming_items"] = [
+            {
+                "id": item.id,
+                "title": item.title,
+                "due_date": item.due_date.isoformat() if item.due_date else None,
+            }
+            for item in self.get_upcoming_items(
+                settings.classroom_summary_upcoming_items, filter_item_for_user
+            )
+        ]
+        return summary_dict
 
     def create_topic(self, name: str) -> Topic:
         topic = Topic(name)
-        self.__topics.append(topic)
+        self.__topics[topic.id] = topic
+        fragment_cache.invalidate(self)
         return topic
 
     def get_topic_by_id(self, topic_id: str) -> Topic | None:
-        for topic in self.__topics:
-            if topic.id == topic_id:
-                return topic
-        return None
+        return self.__topics.get(topic_id)
 
     def get_item_by_id(self, item_id: str) -> BaseItem | None:
-        for item in self.__items:
-            if item.id == item_id:
-                return item
-        return None
+        return self.__items.get(item_id)
+
+    def is_item_visible_to(self, item: BaseItem, user: User) -> bool:
+        if self.__items.get(item.id) is not item:
+            return False
+        if user == self.__owner:
+            return True
+        entry = (item.cursor, item.id)
+        return contains_entry(self.__everyone_items, entry) or contains_entry(
+            self.__student_items.get(user.id, []), entry
+        )
+
+    def get_visible_item_count(self, user: User | None) -> int:
+        if user is None or user == self.__owner:
+            return len(self.__items)
+        return len(self.__everyone_items) + len(self.__student_items.get(user.id, []))
+
+    def __iter_visible_items(
+        self, user: User | None, cursor: tuple[int, str] | None = None
+    ) -> Iterator[tuple[tuple[int, str], BaseItem]]:
+        if user is None or user == self.__owner:
+            entries = iter_entries_before(self.__item_order, cursor)
+        else:
+            entries = merge(
+                iter_entries_before(self.__everyone_items, cursor),
+                iter_entries_before(self.__student_items.get(user.id, []), cursor),
+                reverse=True,
+            )
+        for entry in entries:
+            yield entry, self.__items[entry[1]]
+
+    def get_items_page(
+        self,
+        cursor: tuple[int, str] | None,
+        limit: int,
+        topic: Topic | None = None,
+        item_type: ClassroomItemType | None = None,
+        filter_item_for_user: User | None = None,
+    ) -> tuple[list[BaseItem], tuple[int, str] | None]:
+        items: list[BaseItem] = []
+        last_cursor: tuple[int, str] | None = None
+        for item_cursor, item in self.__iter_visible_items(
+            filter_item_for_user, cursor
+        ):
+            if item_type and type(item) is not ITEM_TYPES[item_type]:
+                continue
+            if topic and not (isinstance(item, TopicMixin) and item.topic == topic):
+                continue
+            if len(items) == limit:
+                return items, last_cursor
+            items.append(item)
+            last_cursor = item_cursor
+        return items, None
 
     def add_student(self, student: User) -> bool:
         if student == self.__owner:
             return False
-        if student in self.__students:
+        if student.id in self.__students:
             return False
-        self.__students.append(student)
+        self.__students[student.id] = student
+        fragment_cache.invalidate(self)
         return True
 
     def create_announcement(
@@ -248,12 +425,12 @@ class Classroom:
     ):
         if assigned_to_students:
             for student in assigned_to_students:
-                if student not in self.__students:
+                if student.id not in self.__students:
                     raise ValueError("Invalid student")
         announcement = Announcement(
             attachments, assigned_to_students, announcement_text
         )
-        self.__items.append(announcement)
+        self.__add_item(announcement)
         return announcement
 
     def create_material(
@@ -264,16 +441,16 @@ class Classroom:
         title: str,
         description: str | None,
     ):
-        if topic and topic not in self.__topics:
+        if topic and topic.id not in self.__topics:
             raise ValueError("Invalid topic")
         if assigned_to_students:
             for student in assigned_to_students:
-                if student not in self.__students:
+                if student.id not in self.__students:
                     raise ValueError("Invalid student")
         material = Material(
             topic, attachments, assigned_to_students, title, description
         )
-        self.__items.append(material)
+        self.__add_item(material)
         return material
 
     def create_assignment(
@@ -286,11 +463,11 @@ class Classroom:
         due_date: datetime | None,
         point: int | None,
     ):
-        if topic and topic not in self.__topics:
+        if topic and topic.id not in self.__topics:
             raise ValueError("Invalid topic")
         if assigned_to_students:
             for student in assigned_to_students:
-                if student not in self.__students:
+                if student.id not in self.__students:
                     raise ValueError("Invalid student")
         assignment = Assignment(
             topic,
@@ -301,7 +478,7 @@ class Classroom:
             due_date,
             point,
         )
-        self.__items.append(assignment)
+        self.__add_item(assignment)
         return assignment
 
     def create_question(
@@ -314,11 +491,11 @@ class Classroom:
         due_date: datetime | None,
         point: int | None,
     ):
-        if topic and topic not in self.__topics:
+        if topic and topic.id not in self.__topics:
             raise ValueError("Invalid topic")
         if assigned_to_students:
             for student in assigned_to_students:
-                if student not in self.__students:
+                if student.id not in self.__students:
                     raise ValueError("Invalid student")
         question = Question(
             topic,
@@ -329,7 +506,7 @@ class Classroom:
             due_date,
             point,
         )
-        self.__items.append(question)
+        self.__add_item(question)
         return question
 
     def create_multiple_choice_question(
@@ -343,11 +520,11 @@ class Classroom:
         point: int | None,
         choices: list[str],
     ):
-        if topic and topic not in self.__topics:
+        if topic and topic.id not in self.__topics:
             raise ValueError("Invalid topic")
         if assigned_to_students:
             for student in assigned_to_students:
-                if student not in self.__students:
+                if student.id not in self.__students:
                     raise ValueError("Invalid student")
         multiple_choice_question = MultipleChoiceQuestion(
             topic,
@@ -359,11 +536,113 @@ class Classroom:
             point,
             choices,
         )
-        self.__items.append(multiple_choice_question)
+        self.__add_item(multiple_choice_question)
         return multiple_choice_question
 
+    def iter_tasks(
+        self,
+        user: User | None,
+        due_after: datetime | None = None,
+        due_before: datetime | None = None,
+    ) -> Iterator[tuple[float, Assignment | Question]]:
+        start = due_after.timestamp() if due_after else None
+        if due_before:
+            end = due_before.timestamp()
+        else:
+            end = math.inf if due_after else None
+        if user is None or user == self.__owner:
+            sources = [self.__task_order]
+        else:
+            sources = [self.__everyone_tasks, self.__student_tasks.get(user.id, [])]
+        entries = merge(
+            *(iter_entries_between(source, start, end) for source in sources)
+        )
+        for due_date, item_id in entries:
+            yield due_date, self.__items[item_id]  # type: ignore
+
+    def get_upcoming_items(
+        self, limit: int, filter_item_for_user: User | None = None
+    ) -> list[Assignment | Question]:
+        tasks = self.iter_tasks(filter_item_for_user, due_after=datetime.now())
+        return [item for _, item in islice(tasks, limit)]
+
+    def set_item_due_date(self, item: BaseItem, due_date: datetime | None) -> None:
+        if not isinstance(item, DueDateMixin) or item.id not in self.__items:
+            raise ValueError("Invalid item")
+        self.__unindex_task(item)
+        item._set_due_date(due_date)
+        self.__index_task(item)
+
+    def set_item_assigned_to_students(
+        self, item: BaseItem, assigned_to_students: list[User] | None
+    ) -> None:
+        if item.id not in self.__items:
+            raise ValueError("Invalid item")
+        if assigned_to_students:
+            for student in assigned_to_students:
+                if student.id not in self.__students:
+                    raise ValueError("Invalid student")
+        self.__unindex_visibility(item)
+        self.__unindex_task(item)
+        item._set_assigned_to_students(assigned_to_students)
+        self.__index_visibility(item)
+        self.__index_task(item)
+
+    def __index_visibility(self, item: BaseItem) -> None:
+        entry = (item.cursor, item.id)
+        if item.assigned_to_students is None:
+            insort(self.__everyone_items, entry)
+            return
+        for student_id in {student.id for student in item.assigned_to_students}:
+            insort(self.__student_items.setdefault(student_id, []), entry)
+
+    def __unindex_visibility(self, item: BaseItem) -> None:
+        entry = (item.cursor, item.id)
+        remove_entry(self.__everyone_items, entry)
+        for student_id in {student.id for student in item.assigned_to_students or []}:
+            remove_entry(self.__student_items.get(student_id, []), entry)
+
+    def __index_task(self, item: BaseItem) -> None:
+        if not isinstance(item, DueDateMixin):
+            return
+        due_date = item.due_date.timestamp() if item.due_date else math.inf
+        entry = (due_date, item.id)
+        self.__item_due_dates[item.id] = due_date
+        insort(self.__task_order, entry)
+        if item.assigned_to_students is None:
+            insort(self.__everyone_tasks, entry)
+            return
+        for student_id in {student.id for student in item.assigned_to_students}:
+            insort(self.__student_tasks.setdefault(student_id, []), entry)
+
+    def __unindex_task(self, item: BaseItem) -> None:
+        due_date = self.__item_due_dates.pop(item.id, None)
+        if due_date is None:
+            return
+        entry = (due_date, item.id)
+        remove_entry(self.__task_order, entry)
+        remove_entry(self.__everyone_tasks, entry)
+        for student_id in {student.id for student in item.assigned_to_students or []}:
+            remove_entry(self.__student_tasks.get(student_id, []), entry)
+
+    def __add_item(self, item: BaseItem) -> None:
+        item._place(self.__id, self.__item_counter + 1)
+        self.attach_item(item)
+
+    def attach_item(self, item: BaseItem) -> None:
+        if item.classroom_id != self.__id or item.id in self.__items:
+            return
+        self.__items[item.id] = item
+        self.__item_counter = max(self.__item_counter, item.cursor)
+        insort(self.__item_order, (item.cursor, item.id))
+        self.__index_visibility(item)
+        self.__index_task(item)
+
     def delete_item(self, item: BaseItem) -> bool:
-        if item not in self.__items:
+        if self.__items.get(item.id) is not item:
             return False
-        self.__items.remove(item)
+        self.__unindex_visibility(item)
+        del self.__items[item.id]
+        remove_entry(self.__item_order, (item.cursor, item.id))
+        self.__unindex_task(item)
         return True
@@ -1,19 +1,26 @@
 from uuid import uuid4
-from datetime import datetime
 
+from .compact import now_timestamp, to_datetime
 from .user import User
 
+
 class Comment:
+    __slots__ = ("__id", "__owner", "__text", "__created_at")
+
     def __init__(self, owner: User, text: str) -> None:
         self.__id: str = str(uuid4())
         self.__owner: User = owner
         self.__text: str = text
-        self.__created_at: datetime = datetime.now()
+        self.__created_at: int = now_timestamp()
+
+    @property
+    def owner(self) -> User:
+        return self.__owner
 
     def to_dict(self) -> dict:
         return {
             "id": self.__id,
             "owner": self.__owner.to_dict(),
             "text": self.__text,
-            "created_at": self.__created_at.isoformat(),
+            "created_at": to_datetime(self.__created_at).isoformat(),
         }
@@ -0,0 +1,26 @@
+import time
+from datetime import datetime
+from functools import lru_cache
+
+
+def now_timestamp() -> int:
+    return time.time_ns() // 1000
+
+
+def to_datetime(timestamp: int) -> datetime:
+    seconds, microseconds = divmod(timestamp, 1000000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=microseconds)
+
+
+@lru_cache
+def get_slot_names(cls: type) -> tuple[str, ...]:
+    slot_names: list[str] = []
+    for base in cls.__mro__:
+        slots = base.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name in ("__dict__", "__weakref__"):
+                continue
+            if name.startswith("__") and not name.endswith("__"):
+                name = f"_{base.__name__.lstrip('_')}{name}"
+            slot_names.append(name)
+    return tuple(slot_names)
@@ -1,20 +1,216 @@
-from typing import BinaryIO
+from datetime import datetime
+from heapq import merge
+from itertools import islice
+from threading import Event
+from typing import Callable, Iterator, TypeVar
 
-from ..constants.enums import TaskType
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from ..config.config import get_settings
+from ..constants.enums import TaskStatus, TaskType
+from ..exceptions.attachment import AttachmentInUse
 from ..exceptions.classroom import InvalidCode, UserAlreadyInClassroom
+from ..exceptions.storage import StorageConflict, StorageOutOfSync
 from ..exceptions.user import EmailAlreadyInUse, UsernameAlreadyInUse
 from .attachment import Attachment
+from .avatar import prerender_avatars
+from .blob_store import blob_store
 from .classroom import Classroom
-from .items import Assignment, MultipleChoiceQuestion, Question
+from .fragment_cache import fragment_cache
+from .items import BaseItem, SubmissionsMixin
+from .storage import Storage, get_storage, restore_state
+from .submission import Submission
 from .task import Task, ToDoTask, ToReviewTask
 from .user import User
 
+settings = get_settings()
+
+Changes = TypeVar("Changes", bound=tuple)
+
 
 class Controller:
-    def __init__(self) -> None:
-        self.__users: list[User] = []
-        self.__classrooms: list[Classroom] = []
-        self.__attachments: list[Attachment] = []
+    def __init__(self, storage: Storage) -> None:
+        self.__storage: Storage = storage
+        self.__reload()
+
+    def __reload(self) -> None:
+        self.__users: dict[str, User] = {}
+        self.__users_by_email: dict[str, User] = {}
+        self.__users_by_username: dict[str, User] = {}
+        self.__classrooms: dict[str, Classroom] = {}
+        self.__classrooms_by_code: dict[str, Classroom] = {}
+        self.__attachments: dict[str, Attachment] = {}
+        self.__owned_classrooms: dict[str, dict[str, Classroom]] = {}
+        self.__enrolled_classrooms: dict[str, dict[str, Classroom]] = {}
+        self.__attachment_items: dict[str, dict[str, None]] = {}
+        self.__item_attachments: dict[str, set[str]] = {}
+        self.__restore()
+
+    def __restore(self) -> None:
+        objects = self.__storage.load()
+        for obj in objects:
+            if isinstance(obj, User):
+                self.__index_user(obj)
+            elif isinstance(obj, Attachment):
+                self.__index_attachment(obj)
+        for obj in objects:
+            if isinstance(obj, Classroom):
+                self.__index_classroom(obj)
+                for student in obj.students:
+                    self.__index_enrollment(obj, student)
+        orphaned_items = [
+            obj
+            for obj in objects
+            if isinstance(obj, BaseItem) and obj.classroom_id not in self.__classrooms
+        ]
+        for obj in objects:
+            if isinstance(obj, BaseItem):
+                self.__attach_item(obj)
+        if orphaned_items:
+            self.delete(*orphaned_items)
+
+    def __index_user(self, user: User) -> None:
+        self.__users[user.id] = user
+        self.__users_by_email[user.email] = user
+        self.__users_by_username[user.username] = user
+
+    def __index_attachment(self, attachment: Attachment) -> None:
+        self.__attachments[attachment.id] = attachment
+        if not attachment.deleted:
+            blob_store.acquire(attachment.checksum)
+
+    def __index_classroom(self, classroom: Classroom) -> None:
+        self.__classrooms[classroom.id] = classroom
+        self.__classrooms_by_code[classroom.code] = classroom
+        owned_classrooms = self.__owned_classrooms.setdefault(classroom.owner.id, {})
+        owned_classrooms[classroom.id] = classroom
+
+    def __index_enrollment(self, classroom: Classroom, student: User) -> None:
+        enrolled_classrooms = self.__enrolled_classrooms.setdefault(student.id, {})
+        enrolled_classrooms[classroom.id] = classroom
+
+    def __attach_item(self, item: BaseItem) -> None:
+        if item.classroom_id in self.__classrooms:
+            self.__classrooms[item.classroom_id].attach_item(item)
+            self.__index_item_attachments(item)
+
+    def __detach_item(self, item: BaseItem) -> None:
+        if item.classroom_id in self.__classrooms:
+            self.__classrooms[item.classroom_id].delete_item(item)
+        self.__unindex_item_attachments(item)
+
+    def __index_item_attachments(self, item: BaseItem) -> None:
+        attachment_ids = {attachment.id for attachment in item.attachments}
+        if isinstance(item, SubmissionsMixin):
+            for submission in item.submissions:
+                attachment_ids.update(
+                    attachment.id for attachment in submission.attachments
+                )
+        previous_ids = self.__item_attachments.get(item.id, set())
+        for attachment_id in previous_ids - attachment_ids:
+            self.__attachment_items[attachment_id].pop(item.id, None)
+        for attachment_id in attachment_ids - previous_ids:
+            self.__attachment_items.setdefault(attachment_id, {})[item.id] = None
+        self.__item_attachments[item.id] = attachment_ids
+
+    def __unindex_item_attachments(self, item: BaseItem) -> None:
+        for attachment_id in self.__item_attachments.pop(item.id, set()):
+            self.__attachment_items[attachment_id].pop(item.id, None)
+
+    def __unindex_user(self, user: User) -> None:
+        self.__users.pop(user.id, None)
+        self.__users_by_email.pop(user.email, None)
+        self.__users_by_username.pop(user.username, None)
+
+    def __unindex_classroom(self, classroom: Classroom) -> None:
+        self.__classrooms.pop(classroom.id, None)
+        self.__classrooms_by_code.pop(classroom.code, None)
+        self.__owned_classrooms.get(classroom.owner.id, {}).pop(classroom.id, None)
+        for student in classroom.students:
+            self.__enrolled_classrooms.get(student.id, {}).pop(classroom.id, None)
+
+    def refresh(self) -> None:
+        try:
+            changes = self.__storage.poll()
+        except StorageOutOfSync:
+            blob_store.clear()
+            self.__reload()
+            return
+        changes.sort(key=lambda change: isinstance(change[0] or change[1], BaseItem))
+        for current, fresh in changes:
+            if isinstance(current, User):
+                self.__unindex_user(current)
+            elif isinstance(current, Classroom):
+                self.__unindex_classroom(current)
+                if fresh is None:
+                    for item in current.items:
+                        self.__unindex_item_attachments(item)
+            elif isinstance(current, BaseItem):
+                self.__detach_item(current)
+            if isinstance(current, Attachment) and not current.deleted:
+                if not isinstance(fresh, Attachment) or fresh.deleted:
+                    blob_store.release(
+                        current.checksum, self.__storage.is_blob_referenced
+                    )
+            if fresh is None:
+                continue
+            items = current.items if isinstance(current, Classroom) else []
+            if current is not None:
+                submission_item = (
+                    current.item if isinstance(current, Submission) else None
+                )
+                restore_state(current, fresh)
+                if isinstance(current, Submission):
+                    current.item = submission_item
+                elif isinstance(current, SubmissionsMixin):
+                    current.attach_submissions()
+                fragment_cache.invalidate(current)
+                if isinstance(current, User):
+                    fragment_cache.invalidate_dependents(current.id)
+                fresh = current
+            if isinstance(fresh, User):
+                self.__index_user(fresh)
+            elif isinstance(fresh, Attachment) and current is None:
+                self.__index_attachment(fresh)
+            elif isinstance(fresh, Classroom):
+                self.__index_classroom(fresh)
+                for student in fresh.students:
+                    self.__index_enrollment(fresh, student)
+                for item in items:
+                    fresh.attach_item(item)
+            elif isinstance(fresh, BaseItem):
+                self.__attach_item(fresh)
+
+    def save(self, *objects: object) -> None:
+        self.__storage.save(objects)
+        items = {obj.id: obj for obj in objects if isinstance(obj, BaseItem)}
+        for obj in objects:
+            if isinstance(obj, Submission) and isinstance(obj.item, BaseItem):
+                items[obj.item.id] = obj.item
+        for item in items.values():
+            self.__index_item_attachments(item)
+
+    def update(self, mutate: Callable[[], Changes]) -> Changes:
+        for _ in range(settings.storage_conflict_retries):
+            changes = mutate()
+            try:
+                self.save(*changes)
+                return changes
+            except StorageConflict:
+                self.refresh()
+        changes = mutate()
+        self.save(*changes)
+        return changes
+
+    def delete(self, *objects: object) -> None:
+        self.__storage.delete(objects)
+        for obj in objects:
+            if isinstance(obj, BaseItem):
+                self.__unindex_item_attachments(obj)
+
+    def close(self) -> None:
+        self.__storage.close()
 
     def create_user(self, username: str, email: str, password_hash: str) -> User:
         if self.get_user_by_email(email) is not None:
@@ -22,26 +218,88 @@ class Controller:
         if self.get_user_by_username(username) is not None:
             raise UsernameAlreadyInUse("Username already in use")
         user = User(username, email, password_hash)
-        self.__users.append(user)
+        self.save(user)
+        self.__index_user(user)
         return user
 
+    def create_users(self, users: list[tuple[str, str, str]]) -> list[User]:
+        emails: set[str] = set()
+        usernames: set[str] = set()
+        for username, email, _ in users:
+            if email in emails or self.get_user_by_email(email) is not None:
+                raise EmailAlreadyInUse(f"Email already in use: {email}")
+            if username in usernames or self.get_user_by_username(username) is not None:
+                raise UsernameAlreadyInUse(f"Username already in use: {username}")
+            emails.add(email)
+            usernames.add(username)
+        created_users = [
+            User(username, email, password_hash)
+            for username, email, password_hash in users
+        ]
+        self.save(*created_users)
+        for user in created_users:
+            self.__index_user(user)
+        return created_users
+
+    def get_users(self) -> list[User]:
+        return list(self.__users.values())
+
     def get_user_by_id(self, user_id: str) -> User | None:
-        for user in self.__users:
-            if user.id == user_id:
-                return user
-        return None
+        return self.__users.get(user_id)
+
+    def get_users_by_ids(self, user_ids: list[str]) -> tuple[list[User], list[str]]:
+        users: list[User] = []
+        missing_ids: dict[str, None] = {}
+        for user_id in user_ids:
+            user = self.__users.get(user_id)
+            if user is None:
+                missing_ids[user_id] = None
+            else:
+                users.append(user)
+        return users, list(missing_ids)
 
     def get_user_by_email(self, email: str) -> User | None:
-        for user in self.__users:
-            if user.email == email:
-                return user
-        return None
+        return self.__users_by_email.get(email)
 
     def get_user_by_username(self, username: str) -> User | None:
-        for user in self.__users:
-            if user.username == username:
-                return user
-        return None
+        return self.__users_by_username.get(username)
+
+    def update_user(
+        self,
+        user: User,
+        username: str,
+        email: str,
+        hashed_password: str | None = None,
+    ) -> None:
+        user_with_email = self.get_user_by_email(email)
+        if user_with_email is not None and user_with_email != user:
+            raise EmailAlreadyInUse("Email already in use")
+        user_with_username = self.get_user_by_username(username)
+        if user_with_username is not None and user_with_username != user:
+            raise UsernameAlreadyInUse("Username already in use")
+
+        def rename_user() -> tuple[User]:
+            self.__unindex_user(user)
+            user.email = email
+            user.username = username
+            if hashed_password is not None:
+                user.hashed_password = hashed_password
+            self.__index_user(user)
+            return (user,)
+
+        try:
+            self.update(rename_user)
+        except (EmailAlreadyInUse, UsernameAlreadyInUse):
+            self.refresh()
+            raise
+
+    async def prerender_avatars(self, max_workers: int, stop_event: Event) -> None:
+        await run_in_threadpool(
+            prerender_avatars,
+            [user.avatar.id for user in self.__users.values()],
+            max_workers,
+            stop_event,
+        )
 
     def create_classroom(
         self,
@@ -52,27 +310,54 @@ class Controller:
         room: str | None,
     ) -> Classroom:
         classroom = Classroom(owner, name, section, subject, room)
-        self.__classrooms.append(classroom)
+        self.__index_classroom(classroom)
+        self.save(classroom)
         return classroom
 
     def get_classroom_by_id(self, classroom_id: str) -> Classroom | None:
-        for classroom in self.__classrooms:
-            if classroom.id == classroom_id:
-                return classroom
-        return None
+        return self.__classrooms.get(classroom_id)
 
     def get_classroom_by_code(self, classroom_code: str) -> Classroom | None:
-        for classroom in self.__classrooms:
-            if classroom.code == classroom_code:
-                return classroom
-        return None
+        classroom = self.__classrooms_by_code.get(classroom_code)
+        if classroom is None and self.__storage.get_classroom_key_by_code(
+            classroom_code
+        ):
+            self.refresh()
+            classroom = self.__classrooms_by_code.get(classroom_code)
+        return classroom
+
+    def get_owned_classrooms_for_user(self, user: User) -> list[Classroom]:
+        return list(self.__owned_classrooms.get(user.id, {}).values())
+
+    def get_enrolled_classrooms_for_user(self, user: User) -> list[Classroom]:
+        return list(self.__enrolled_classrooms.get(user.id, {}).values())
 
     def get_classrooms_for_user(self, user: User) -> list[Classroom]:
-        classrooms: list[Classroom] = []
-        for classroom in self.__classrooms:
-            if user in classroom:
-                classrooms.append(classroom)
-        return classrooms
+        owned_classrooms = self.get_owned_classrooms_for_user(user)
+        enrolled_classrooms = self.get_enrolled_classrooms_for_user(user)
+        return sorted(
+            owned_classrooms + enrolled_classrooms,
+            key=lambda classroom: classroom.created_at,
+        )
+
+    def add_student_to_classroom(self, classroom: Classroom, student: User) -> bool:
+        return bool(self.add_students_to_classroom(classroom, [student]))
+
+    def add_students_to_classroom(
+        self, classroom: Classroom, students: list[User]
+    ) -> list[User]:
+        added_students: list[User] = []
+
+        def add_students() -> tuple[Classroom, ...]:
+            added_students.clear()
+            for student in students:
+                if classroom.add_student(student):
+                    self.__index_enrollment(classroom, student)
+                    added_students.append(student)
+            return (classroom,) if added_students else ()
+
+        self.update(add_students)
+        return added_students
 
     def join_classroom_by_code(self, user: User, classroom_code: str) -> Classroom:
         classroom = self.get_classroom_by_code(classroom_code)
@@ -80,55 +365,130 @@ class Controller:
             raise InvalidCode("Invalid classroom code")
         if user in classroom:
             raise UserAlreadyInClassroom("User already exist in that classroom")
-        classroom.add_student(user)
+        self.add_student_to_classroom(classroom, user)
         return classroom
 
     def delete_classroom(self, classroom: Classroom) -> bool:
-        if classroom not in self.__classrooms:
+        if self.__classrooms.get(classroom.id) != classroom:
             return False
-        self.__classrooms.remove(classroom)
+        del self.__classrooms[classroom.id]
+        del self.__classrooms_by_code[classroom.code]
+        del self.__owned_classrooms[classroom.owner.id][classroom.id]
+        for student in classroom.students:
+            del self.__enrolled_classrooms[student.id][classroom.id]
+        for item in classroom.items:
+            self.__unindex_item_attachments(item)
+        self.__storage.delete([classroom])
         return True
 
-    def create_attachment(
-        self, original_filename: str, content_type: str, data: BinaryIO, owner: User
+    async def create_attachment(
+        self, original_filename: str, content_type: str, data: UploadFile, owner: User
     ) -> Attachment:
-        attachment = Attachment(original_filename, content_type, data, owner)
-        self.__attachments.append(attachment)
+        temporary_path, checksum, size = await blob_store.write(data)
+        with blob_store.commit(
+            temporary_path, checksum, self.__storage.is_blob_referenced
+        ):
+            attachment = Attachment(
+                original_filename, content_type, owner, checksum, size
+            )
+            self.save(attachment)
+        self.__attachments[attachment.id] = attachment
         return attachment
 
     def get_attachment_by_id(self, attachment_id: str) -> Attachment | None:
-        for attachment in self.__attachments:
-            if attachment.id == attachment_id:
-                return attachment
-        return None
+        attachment = self.__attachments.get(attachment_id)
+        if attachment is None or attachment.deleted:
+            return None
+        return attachment
+
+    def get_attachments_by_ids(
+        self, attachment_ids: list[str]
+    ) -> tuple[list[Attachment], list[str]]:
+        attachments: list[Attachment] = []
+        missing_ids: dict[str, None] = {}
+        for attachment_id in attachment_ids:
+            attachment = self.__attachments.get(attachment_id)
+            if attachment is None or attachment.deleted:
+                missing_ids[attachment_id] = None
+            else:
+                attachments.append(attachment)
+        return attachments, list(missing_ids)
+
+    def is_attachment_referenced(self, attachment: Attachment) -> bool:
+        return bool(self.__attachment_items.get(attachment.id))
+
+    def delete_attachment(self, attachment: Attachment) -> bool:
+        if self.get_attachment_by_id(attachment.id) != attachment:
+            return False
+        if self.is_attachment_referenced(attachment):
+            raise AttachmentInUse("Attachment is still in use")
+        attachment.deleted = True
+        self.save(attachment)
+        blob_store.release(attachment.checksum, self.__storage.is_blob_referenced)
+        return True
 
-    def get_tasks_for_user(self, user: User, task_type: TaskType) -> list[Task]:
-        tasks: list[Task] = []
+    def get_tasks_for_user(
+        self,
+        user: User,
+        task_type: TaskType,
+        limit: int | None = None,
+        due_after: datetime | None = None,
+        due_before: datetime | None = None,
+    ) -> list[Task]:
+        if task_type == TaskType.TODO:
+            classrooms = self.get_enrolled_classrooms_for_user(user)
+            task_class = ToDoTask
+        elif task_type == TaskType.TO_REVIEW:
+            classrooms = self.get_owned_classrooms_for_user(user)
+            task_class = ToReviewTask
+        else:
+            raise ValueError("Invalid task type")
+        entries = merge(
+            *(
+                (
+                    (due_date, item, classroom)
+                    for due_date, item in classroom.iter_tasks(
+                        user, due_after, due_before
+                    )
+                )
+                for classroom in classrooms
+            ),
+            key=lambda entry: entry[0],
+        )
+        return [
+            task_class(classroom, item, user)
+            for _, item, classroom in islice(entries, limit)
+        ]
+
+    def get_due_tasks_for_user(
+        self, user: User, task_type: TaskType, start: datetime, end: datetime
+    ) -> tuple[list[Task], list[Task]]:
+        now = datetime.now().astimezone()
+        overdue_tasks = self.get_tasks_for_user(
+            user,
+            task_type,
+            due_after=start,
+            due_before=min(end, now, key=datetime.timestamp),
+        )
+        upcoming_tasks = self.get_tasks_for_user(
+            user,
+            task_type,
+            due_after=max(start, now, key=datetime.timestamp),
+            due_before=end,
+        )
         if task_type == TaskType.TODO:
-            classrooms = self.get_classrooms_for_user(user)
-            for classroom in classrooms:
-                if user == classroom.owner:
-                    continue
-                for item in classroom.items:
-                    if not isinstance(
-                        item, (Assignment, Question, MultipleChoiceQuestion)
-                    ):
-                        continue
-                    tasks.append(ToDoTask(classroom, item, user))
-            return tasks
-        if task_type == TaskType.TO_REVIEW:
-            classrooms = self.get_classrooms_for_user(user)
-            for classroom in classrooms:
-                if user != classroom.owner:
-                    continue
-                for item in classroom.items:
-                    if not isinstance(
-                        item, (Assignment, Question, MultipleChoiceQuestion)
-                    ):
-                        continue
-                    tasks.append(ToReviewTask(classroom, item, user))
-            return tasks
-        raise ValueError("Invalid task type")
-
-
-controller = Controller()
+            overdue_tasks: list[Task] = [
+                task
+                for task in overdue_tasks
+                if isinstance(task, ToDoTask) and task.status == TaskStatus.ASSIGNED
+            ]
+        return overdue_tasks, upcoming_tasks
+
+    def iter_gradebook(self, classroom: Classroom) -> Iterator[dict]:
+        for student in classroom.students:
+            tasks = list(classroom.iter_tasks(student))
+            for _, item in tasks:
+                yield ToDoTask(classroom, item, student).to_gradebook_dict()
+
+
+controller = Controller(get_storage())
@@ -0,0 +1,32 @@
+import csv
+import io
+from typing import AsyncIterator, Iterable
+
+from ..config.config import get_settings
+from .json_response import dump_json
+
+settings = get_settings()
+
+
+async def iter_csv(rows: Iterable[dict], columns: list[str]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, columns)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= settings.export_chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+async def iter_jsonl(rows: Iterable[dict]) -> AsyncIterator[bytes]:
+    chunk = bytearray()
+    for row in rows:
+        chunk += dump_json(row)
+        chunk += b"\n"
+        if len(chunk) >= settings.export_chunk_size:
+            yield bytes(chunk)
+            chunk.clear()
+    yield bytes(chunk)
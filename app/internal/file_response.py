@@ -0,0 +1,120 @@
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator
+
+from fastapi import Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from ..config.config import get_settings
+
+settings = get_settings()
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def is_not_modified(headers: Headers, etag: str, modified_at: float) -> bool:
+    if if_none_match := headers.get("if-none-match"):
+        return etag_matches(if_none_match, etag)
+    if if_modified_since := headers.get("if-modified-since"):
+        try:
+            return (
+                int(modified_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+            )
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    unit, _, byte_range = header.partition("=")
+    if unit.strip() != "bytes" or "," in byte_range:
+        raise ValueError("Unsupported range")
+    start, _, end = byte_range.strip().partition("-")
+    if not start:
+        if not end or int(end) == 0:
+            return None
+        return max(size - int(end), 0), size - 1
+    if int(start) >= size:
+        return None
+    if not end:
+        return int(start), size - 1
+    if int(end) < int(start):
+        raise ValueError("Invalid range")
+    return int(start), min(int(end), size - 1)
+
+
+async def iter_file_range(path: str, start: int, end: int) -> AsyncIterator[bytes]:
+    input_file = await run_in_threadpool(open, path, "rb")
+    try:
+        await run_in_threadpool(input_file.seek, start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await run_in_threadpool(
+                input_file.read, min(settings.attachment_chunk_size, remaining)
+            )
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await run_in_threadpool(input_file.close)
+
+
+async def create_file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    etag: str,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    stat_result = await run_in_threadpool(os.stat, path)
+    size = stat_result.st_size
+    etag = f'"{etag}"'
+    response_headers = {
+        **(headers or {}),
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "accept-ranges": "bytes",
+    }
+
+    if is_not_modified(request.headers, etag, stat_result.st_mtime):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=response_headers
+        )
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            byte_range = (0, size - 1)
+        if byte_range is None:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**response_headers, "content-range": f"bytes */{size}"},
+            )
+        start, end = byte_range
+        if (start, end) != (0, size - 1):
+            return StreamingResponse(
+                iter_file_range(path, start, end),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type=media_type,
+                headers={
+                    **response_headers,
+                    "content-range": f"bytes {start}-{end}/{size}",
+                    "content-length": str(end - start + 1),
+                },
+            )
+
+    return FileResponse(
+        path, media_type=media_type, headers=response_headers, stat_result=stat_result
+    )
@@ -0,0 +1,49 @@
+from typing import Any, Iterable
+from weakref import WeakKeyDictionary, WeakSet
+
+
+class FragmentCache:
+    def __init__(self) -> None:
+        self.__fragments: WeakKeyDictionary[object, dict[str, tuple[Any, Any]]] = (
+            WeakKeyDictionary()
+        )
+        self.__dependents: dict[str, WeakSet] = {}
+
+    def get(self, owner: object, part: str, key: Any = None) -> Any:
+        fragments = self.__fragments.get(owner)
+        if fragments is None:
+            return None
+        entry = fragments.get(part)
+        if entry is None or entry[0] != key:
+            return None
+        return entry[1]
+
+    def put(
+        self,
+        owner: object,
+        part: str,
+        fragment: Any,
+        key: Any = None,
+        dependencies: Iterable[str] = (),
+    ) -> Any:
+        fragments = self.__fragments.get(owner)
+        if fragments is None:
+            fragments = {}
+            self.__fragments[owner] = fragments
+        fragments[part] = (key, fragment)
+        for dependency in dependencies:
+            self.__dependents.setdefault(dependency, WeakSet()).add(owner)
+        return fragment
+
+    def invalidate(self, owner: object) -> None:
+        try:
+            self.__fragments.pop(owner, None)
+        except TypeError:
+            pass
+
+    def invalidate_dependents(self, dependency: str) -> None:
+        for owner in list(self.__dependents.pop(dependency, ())):
+            self.invalidate(owner)
+
+
+fragment_cache = FragmentCache()
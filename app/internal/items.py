@@ -2,14 +2,31 @@ from abc import ABC, abstractmethod
 from datetime import datetime
 from uuid import uuid4
 
+from orjson import Fragment
+
 from .attachment import Attachment
 from .comment import Comment
+from .compact import now_timestamp, to_datetime
+from .fragment_cache import fragment_cache
+from .json_response import json_fragment
 from .submission import Submission
 from .topic import Topic
 from .user import User
 
 
 class BaseItem(ABC):
+    __slots__ = (
+        "_id",
+        "_created_at",
+        "_edited_at",
+        "_attachments",
+        "_assigned_to_students",
+        "_comments",
+        "_classroom_id",
+        "_cursor",
+        "__weakref__",
+    )
+
     def __init__(
         self,
         attachments: list[Attachment],
@@ -18,23 +35,33 @@ class BaseItem(ABC):
     ) -> None:
         super().__init__(**kwargs)
         self._id: str = str(uuid4())
-        self._created_at: datetime = datetime.now()
-        self._edited_at: datetime = datetime.now()
+        self._created_at: int = now_timestamp()
+        self._edited_at: int = self._created_at
         self._attachments: list[Attachment] = attachments
         self._assigned_to_students: list[User] | None = assigned_to_students
         self._comments: list[Comment] = []
+        self._classroom_id: str | None = None
+        self._cursor: int = 0
 
     @property
     def id(self) -> str:
         return self._id
 
+    @property
+    def classroom_id(self) -> str | None:
+        return self._classroom_id
+
+    @property
+    def cursor(self) -> int:
+        return self._cursor
+
     @property
     def created_at(self) -> datetime:
-        return self._created_at
+        return to_datetime(self._created_at)
 
     @property
     def edited_at(self) -> datetime:
-        return self._edited_at
+        return to_datetime(self._edited_at)
 
     @property
     def attachments(self) -> list[Attachment]:
@@ -44,30 +71,65 @@ class BaseItem(ABC):
     def assigned_to_students(self) -> list[User] | None:
         return self._assigned_to_students
 
-    @assigned_to_students.setter
-    def assigned_to_students(self, assinged_to_students: list[User] | None) -> None:
-        self._edited_at = datetime.now()
-        self._assigned_to_students = assinged_to_students
-
     @attachments.setter
     def attachments(self, attachments: list[Attachment]) -> None:
-        self._edited_at = datetime.now()
+        self._edited_at = now_timestamp()
         self._attachments = attachments
 
     @abstractmethod
     def to_dict(self) -> dict:
         pass
 
+    def to_json(self) -> Fragment:
+        item_json = fragment_cache.get(self, "item", self._edited_at)
+        if item_json is None:
+            item_json = fragment_cache.put(
+                self,
+                "item",
+                json_fragment(self.to_dict()),
+                self._edited_at,
+                [comment.owner.id for comment in self._comments],
+            )
+        return item_json
+
+    def _place(self, classroom_id: str, cursor: int) -> None:
+        self._classroom_id = classroom_id
+        self._cursor = cursor
+
+    def _set_assigned_to_students(
+        self, assigned_to_students: list[User] | None
+    ) -> None:
+        self._edited_at = now_timestamp()
+        self._assigned_to_students = assigned_to_students
+
     def create_comment(self, owner: User, text: str) -> Comment:
         comment = Comment(owner, text)
         self._comments.append(comment)
+        fragment_cache.invalidate(self)
         return comment
 
 
+GRADABLE_ITEM_SLOTS = (
+    "_topic",
+    "_title",
+    "_description",
+    "_due_date",
+    "_point",
+    "_submissions",
+    "_submissions_by_owner",
+    "_graded_count",
+)
+
+
 class TopicMixin:
+    __slots__ = ()
+
+    _edited_at: int
+    _topic: Topic | None
+
     def __init__(self, topic: Topic | None, **kwargs) -> None:
         super().__init__(**kwargs)
-        self._topic: Topic | None = topic
+        self._topic = topic
 
     @property
     def topic(self) -> Topic | None:
@@ -75,14 +137,19 @@ class TopicMixin:
 
     @topic.setter
     def topic(self, topic: Topic | None) -> None:
-        self._edited_at = datetime.now()
+        self._edited_at = now_timestamp()
         self._topic = topic
 
 
 class TitleMixin:
+    __slots__ = ()
+
+    _edited_at: int
+    _title: str
+
     def __init__(self, title: str, **kwargs) -> None:
         super().__init__(**kwargs)
-        self._title: str = title
+        self._title = title
 
     @property
     def title(self) -> str:
@@ -90,14 +157,19 @@ class TitleMixin:
 
     @title.setter
     def title(self, title: str) -> None:
-        self._edited_at = datetime.now()
+        self._edited_at = now_timestamp()
         self._title = title
 
 
 class DescriptionMixin:
+    __slots__ = ()
+
+    _edited_at: int
+    _description: str | None
+
     def __init__(self, description: str | None, **kwargs) -> None:
         super().__init__(**kwargs)
-        self._description: str | None = description
+        self._description = description
 
     @property
     def description(self) -> str | None:
@@ -105,14 +177,19 @@ class DescriptionMixin:
 
     @description.setter
     def description(self, description: str | None) -> None:
-        self._edited_at = datetime.now()
+        self._edited_at = now_timestamp()
         self._description = description
 
 
 class PointMixin:
+    __slots__ = ()
+
+    _edited_at: int
+    _point: int | None
+
     def __init__(self, point: int | None, **kwargs) -> None:
         super().__init__(**kwargs)
-        self._point: int | None = point
+        self._point = point
 
     @property
     def point(self) -> int | None:
@@ -120,33 +197,65 @@ class PointMixin:
 
     @point.setter
     def point(self, point: int | None) -> None:
-        self._edited_at = datetime.now()
+        self._edited_at = now_timestamp()
         self._point = point
 
 
 class DueDateMixin:
+    __slots__ = ()
+
+    _edited_at: int
+    _due_date: datetime | None
+
     def __init__(self, due_date: datetime | None, **kwargs) -> None:
         super().__init__(**kwargs)
-        self._due_date: datetime | None = due_date
+        self._due_date = due_date
 
     @property
     def due_date(self) -> datetime | None:
         return self._due_date
 
-    @due_date.setter
-    def due_date(self, due_date: datetime | None) -> None:
-        self._edited_at = datetime.now()
+    def _set_due_date(self, due_date: datetime | None) -> None:
+        self._edited_at = now_timestamp()
         self._due_date = due_date
 
 
 class SubmissionsMixin:
+    __slots__ = ()
+
+    _submissions: dict[str, Submission]
+    _submissions_by_owner: dict[str, Submission]
+    _graded_count: int
+
     def __init__(self, **kwargs) -> None:
         super().__init__(**kwargs)
-        self._submissions: list[Submission] = []
+        self._submissions = {}
+        self._submissions_by_owner = {}
+        self._graded_count = 0
+
+    def __setstate__(self, state: tuple[None, dict]) -> None:
+        for name, value in state[1].items():
+            setattr(self, name, value)
+        self.attach_submissions()
 
     @property
     def submissions(self) -> list[Submission]:
-        return self._submissions
+        return list(self._submissions.values())
+
+    @property
+    def submission_count(self) -> int:
+        return len(self._submissions)
+
+    @property
+    def graded_count(self) -> int:
+        return self._graded_count
+
+    def update_graded_count(self, delta: int) -> None:
+        self._graded_count += delta
+
+    def attach_submissions(self) -> None:
+        for submission in self._submissions.values():
+            submission.item = self
 
     def create_submission(
         self, user: User, attachments: list[Attachment]
@@ -154,29 +263,33 @@ class SubmissionsMixin:
         if previous_submission := self.get_submission_by_owner(user):
             self.delete_submission(previous_submission)
         submission = Submission(user, attachments)
-        self._submissions.append(submission)
+        submission.item = self
+        self._submissions[submission.id] = submission
+        self._submissions_by_owner[user.id] = submission
+        fragment_cache.invalidate(self)
         return submission
 
     def get_submission_by_id(self, submission_id: str) -> Submission | None:
-        for submission in self._submissions:
-            if submission.id == submission_id:
-                return submission
-        return None
+        return self._submissions.get(submission_id)
 
     def get_submission_by_owner(self, owner: User) -> Submission | None:
-        for submission in self._submissions:
-            if submission.owner == owner:
-                return submission
-        return None
+        return self._submissions_by_owner.get(owner.id)
 
     def delete_submission(self, submission: Submission) -> bool:
-        if submission not in self._submissions:
+        if self._submissions.get(submission.id) is not submission:
             return False
-        self._submissions.remove(submission)
+        del self._submissions[submission.id]
+        del self._submissions_by_owner[submission.owner.id]
+        if submission.point is not None:
+            self._graded_count -= 1
+        submission.item = None
+        fragment_cache.invalidate(self)
         return True
 
 
 class Announcement(BaseItem):
+    __slots__ = ("__announcement_text",)
+
     def __init__(
         self,
         attachments: list[Attachment],
@@ -195,15 +308,15 @@ class Announcement(BaseItem):
 
     @announcement_text.setter
     def announcement_text(self, announcement_text: str) -> None:
-        self._edited_at = datetime.now()
+        self._edited_at = now_timestamp()
         self.__announcement_text = announcement_text
 
     def to_dict(self) -> dict:
         return {
             "id": self._id,
             "type": "Announcement",
-            "created_at": self._created_at.isoformat(),
-            "edited_at": self._edited_at.isoformat(),
+            "created_at": self.created_at.isoformat(),
+            "edited_at": self.edited_at.isoformat(),
             "attachments": [attachment.to_dict() for attachment in self._attachments],
             "announcement_text": self.__announcement_text,
             "comments": [comment.to_dict() for comment in self._comments],
@@ -211,6 +324,8 @@ class Announcement(BaseItem):
 
 
 class Material(TopicMixin, TitleMixin, DescriptionMixin, BaseItem):
+    __slots__ = ("_topic", "_title", "_description")
+
     def __init__(
         self,
         topic: Topic | None,
@@ -231,8 +346,8 @@ class Material(TopicMixin, TitleMixin, DescriptionMixin, BaseItem):
         return {
             "id": self._id,
             "type": "Material",
-            "created_at": self._created_at.isoformat(),
-            "edited_at": self._edited_at.isoformat(),
+            "created_at": self.created_at.isoformat(),
+            "edited_at": self.edited_at.isoformat(),
             "attachments": [attachment.to_dict() for attachment in self._attachments],
             "topic": self._topic.to_dict() if self._topic else None,
             "title": self._title,
@@ -250,6 +365,8 @@ class Assignment(
     SubmissionsMixin,
     BaseItem,
 ):
+    __slots__ = GRADABLE_ITEM_SLOTS
+
     def __init__(
         self,
         topic: Topic | None,
@@ -274,13 +391,13 @@ class Assignment(
         return {
             "id": self._id,
             "type": "Assignment",
-            "created_at": self._created_at.isoformat(),
-            "edited_at": self._edited_at.isoformat(),
+            "created_at": self.created_at.isoformat(),
+            "edited_at": self.edited_at.isoformat(),
             "attachments": [attachment.to_dict() for attachment in self._attachments],
             "topic": self._topic.to_dict() if self._topic else None,
             "title": self._title,
             "description": self._description,
-            "due_date": self._due_date,
+            "due_date": self._due_date.isoformat() if self._due_date else None,
             "point": self._point,
             "comments": [comment.to_dict() for comment in self._comments],
         }
@@ -295,6 +412,8 @@ class Question(
     SubmissionsMixin,
     BaseItem,
 ):
+    __slots__ = GRADABLE_ITEM_SLOTS
+
     def __init__(
         self,
         topic: Topic | None,
@@ -319,19 +438,21 @@ class Question(
         return {
             "id": self._id,
             "type": "Question",
-            "created_at": self._created_at.isoformat(),
-            "edited_at": self._edited_at.isoformat(),
+            "created_at": self.created_at.isoformat(),
+            "edited_at": self.edited_at.isoformat(),
             "attachments": [attachment.to_dict() for attachment in self._attachments],
             "topic": self._topic.to_dict() if self._topic else None,
             "title": self._title,
             "description": self._description,
-            "due_date": self._due_date,
+            "due_date": self._due_date.isoformat() if self._due_date else None,
             "point": self._point,
             "comments": [comment.to_dict() for comment in self._comments],
         }
 
 
 class MultipleChoiceQuestion(Question):
+    __slots__ = ("__choices",)
+
     def __init__(
         self,
         topic: Topic | None,
@@ -360,20 +481,20 @@ class MultipleChoiceQuestion(Question):
 
     @choices.setter
     def choices(self, choices: list[str]) -> None:
-        self._edited_at = datetime.now()
+        self._edited_at = now_timestamp()
         self.__choices = choices
 
     def to_dict(self) -> dict:
         return {
             "id": self._id,
             "type": "MultipleChoiceQuestion",
-            "created_at": self._created_at.isoformat(),
-            "edited_at": self._edited_at.isoformat(),
+            "created_at": self.created_at.isoformat(),
+            "edited_at": self.edited_at.isoformat(),
             "attachments": [attachment.to_dict() for attachment in self._attachments],
             "topic": self._topic.to_dict() if self._topic else None,
             "title": self._title,
             "description": self._description,
-            "due_date": self._due_date,
+            "due_date": self._due_date.isoformat() if self._due_date else None,
             "point": self._point,
             "choices": self.__choices,
             "comments": [comment.to_dict() for comment in self._comments],
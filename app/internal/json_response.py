@@ -0,0 +1,19 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def dump_json(content: Any) -> bytes:
+    return orjson.dumps(content)
+
+
+def json_fragment(content: Any) -> orjson.Fragment:
+    return orjson.Fragment(orjson.dumps(content))
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content)
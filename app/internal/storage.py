@@ -0,0 +1,665 @@
+import atexit
+import os
+import pickle
+import sqlite3
+import struct
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from contextlib import suppress
+from io import BytesIO
+from pathlib import Path
+from queue import Empty, SimpleQueue
+from threading import Lock, Thread, local
+from typing import Iterable
+from uuid import uuid4
+
+from ..config.config import get_settings
+from ..constants.enums import StorageBackend
+from ..exceptions.storage import (
+    StorageConflict,
+    StorageOutOfSync,
+    UnsupportedStorageFormat,
+)
+from ..exceptions.user import EmailAlreadyInUse, UsernameAlreadyInUse
+from .attachment import Attachment
+from .classroom import Classroom
+from .compact import get_slot_names
+from .items import BaseItem
+from .submission import Submission
+from .topic import Topic
+from .user import User
+
+settings = get_settings()
+
+
+RECORD_HEADER = struct.Struct("<II")
+
+STORAGE_FORMAT_VERSION = 1
+
+ROOT_KEY_PREFIXES = ("user:", "attachment:", "classroom:", "item:")
+
+
+def get_storage_key(obj: object) -> str | None:
+    if isinstance(obj, User):
+        return f"user:{obj.id}"
+    if isinstance(obj, Attachment):
+        return f"attachment:{obj.id}"
+    if isinstance(obj, Classroom):
+        return f"classroom:{obj.id}"
+    if isinstance(obj, Topic):
+        return f"topic:{obj.id}"
+    if isinstance(obj, BaseItem):
+        return f"item:{obj.id}"
+    if isinstance(obj, Submission):
+        return f"submission:{obj.id}"
+    return None
+
+
+class ObjectPickler(pickle.Pickler):
+    def __init__(self, file: BytesIO, root: object) -> None:
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.__root = root
+
+    def persistent_id(self, obj: object) -> str | None:
+        if obj is self.__root:
+            return None
+        return get_storage_key(obj)
+
+
+class ObjectUnpickler(pickle.Unpickler):
+    def __init__(
+        self, data: bytes, objects: dict[str, object], records: dict[str, bytes]
+    ) -> None:
+        super().__init__(BytesIO(data))
+        self.__objects = objects
+        self.__records = records
+
+    def persistent_load(self, pid: str) -> object:
+        return load_object(pid, self.__objects, self.__records)
+
+
+def dump_object(obj: object) -> bytes:
+    buffer = BytesIO()
+    ObjectPickler(buffer, obj).dump(obj)
+    return buffer.getvalue()
+
+
+def load_object(
+    key: str, objects: dict[str, object], records: dict[str, bytes]
+) -> object:
+    if key not in objects:
+        objects[key] = ObjectUnpickler(records[key], objects, records).load()
+    return objects[key]
+
+
+def restore_state(current: object, fresh: object) -> None:
+    if hasattr(current, "__dict__"):
+        current.__dict__.clear()
+        current.__dict__.update(fresh.__dict__)
+    for name in get_slot_names(type(current)):
+        if hasattr(fresh, name):
+            setattr(current, name, getattr(fresh, name))
+        elif hasattr(current, name):
+            delattr(current, name)
+
+
+class Storage(ABC):
+    @abstractmethod
+    def load(self) -> list[object]:
+        pass
+
+    @abstractmethod
+    def save(self, objects: Iterable[object]) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, objects: Iterable[object]) -> None:
+        pass
+
+    @abstractmethod
+    def poll(self) -> list[tuple[object | None, object | None]]:
+        pass
+
+    @abstractmethod
+    def get_classroom_key_by_code(self, code: str) -> str | None:
+        pass
+
+    @abstractmethod
+    def is_blob_referenced(self, checksum: str) -> bool:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+
+class MemoryStorage(Storage):
+    def load(self) -> list[object]:
+        return []
+
+    def save(self, objects: Iterable[object]) -> None:
+        pass
+
+    def delete(self, objects: Iterable[object]) -> None:
+        pass
+
+    def poll(self) -> list[tuple[object | None, object | None]]:
+        return []
+
+    def get_classroom_key_by_code(self, code: str) -> str | None:
+        return None
+
+    def is_blob_referenced(self, checksum: str) -> bool:
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+class LogStorage(Storage):
+    def __init__(self, path: Path, snapshot_interval: int) -> None:
+        path.mkdir(parents=True, exist_ok=True)
+        self.__snapshot_path: Path = path / "snapshot"
+        self.__log_path: Path = path / "log"
+        self.__snapshot_interval: int = snapshot_interval
+        self.__records_since_snapshot: int = 0
+        self.__log_file = open(self.__log_path, "ab", buffering=0)
+        self.__log_length: int = os.path.getsize(self.__log_path)
+        self.__queue: SimpleQueue[
+            tuple[list[tuple[str, bytes | None]], Future[None]] | None
+        ] = SimpleQueue()
+        self.__writer: Thread | None = None
+        self.__writer_lock = Lock()
+        if not self.__snapshot_path.exists():
+            self.__write_snapshot({})
+
+    def __read_snapshot(self) -> dict[str, bytes]:
+        with open(self.__snapshot_path, "rb") as snapshot_file:
+            format_version, records = pickle.load(snapshot_file)
+        if format_version != STORAGE_FORMAT_VERSION:
+            raise UnsupportedStorageFormat(
+                f"Unsupported storage format {format_version}"
+            )
+        return records
+
+    def __write_snapshot(self, records: dict[str, bytes]) -> None:
+        temporary_path = self.__snapshot_path.with_suffix(".tmp")
+        with open(temporary_path, "wb") as snapshot_file:
+            pickle.dump(
+                (STORAGE_FORMAT_VERSION, records),
+                snapshot_file,
+                pickle.HIGHEST_PROTOCOL,
+            )
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary_path, self.__snapshot_path)
+        self.__log_file.truncate(0)
+        self.__log_length = 0
+        self.__records_since_snapshot = 0
+
+    def __read_log(self, records: dict[str, bytes]) -> int:
+        record_count = 0
+        valid_length = 0
+        with open(self.__log_path, "rb") as log_file:
+            while header := log_file.read(RECORD_HEADER.size):
+                if len(header) < RECORD_HEADER.size:
+                    break
+                length, checksum = RECORD_HEADER.unpack(header)
+                data = log_file.read(length)
+                if len(data) < length or zlib.crc32(data) != checksum:
+                    break
+                key, payload = pickle.loads(data)
+                if payload is None:
+                    records.pop(key, None)
+                else:
+                    records[key] = payload
+                record_count += 1
+                valid_length = log_file.tell()
+        if valid_length < os.path.getsize(self.__log_path):
+            self.__log_file.truncate(valid_length)
+        self.__log_length = valid_length
+        return record_count
+
+    def __discard_failed_writes(self) -> None:
+        if os.fstat(self.__log_file.fileno()).st_size > self.__log_length:
+            self.__log_file.truncate(self.__log_length)
+
+    def __append(self, records: list[tuple[str, bytes | None]]) -> None:
+        buffer = BytesIO()
+        for record in records:
+            data = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+            buffer.write(RECORD_HEADER.pack(len(data), zlib.crc32(data)))
+            buffer.write(data)
+        self.__discard_failed_writes()
+        view = buffer.getbuffer()
+        written = 0
+        while written < len(view):
+            written += self.__log_file.write(view[written:]) or 0
+        os.fsync(self.__log_file.fileno())
+        self.__log_length += written
+        self.__records_since_snapshot += len(records)
+
+    def __compact_log(self) -> None:
+        self.__discard_failed_writes()
+        records = self.__read_snapshot()
+        self.__read_log(records)
+        self.__write_snapshot(records)
+
+    def __commit(
+        self, batches: list[tuple[list[tuple[str, bytes | None]], Future[None]]]
+    ) -> None:
+        try:
+            self.__append([record for records, _ in batches for record in records])
+        except Exception as exp:
+            for _, written in batches:
+                written.set_exception(exp)
+            return
+        for _, written in batches:
+            written.set_result(None)
+        if self.__records_since_snapshot >= self.__snapshot_interval:
+            with suppress(OSError):
+                self.__compact_log()
+
+    def __write(self) -> None:
+        stopping = False
+        while not stopping:
+            jobs = [self.__queue.get()]
+            while True:
+                try:
+                    jobs.append(self.__queue.get_nowait())
+                except Empty:
+                    break
+            batches = [job for job in jobs if job is not None]
+            stopping = len(batches) < len(jobs)
+            if batches:
+                self.__commit(batches)
+        if self.__records_since_snapshot > 0:
+            with suppress(OSError):
+                self.__compact_log()
+
+    def __write_records(self, records: list[tuple[str, bytes | None]]) -> None:
+        with self.__writer_lock:
+            if self.__writer is None:
+                self.__writer = Thread(
+                    target=self.__write, name="log-writer", daemon=True
+                )
+                self.__writer.start()
+                atexit.register(self.close)
+        written: Future[None] = Future()
+        self.__queue.put((records, written))
+        written.result()
+
+    def load(self) -> list[object]:
+        records = self.__read_snapshot()
+        self.__records_since_snapshot = self.__read_log(records)
+        objects: dict[str, object] = {}
+        for key in records:
+            if key.startswith(ROOT_KEY_PREFIXES):
+                load_object(key, objects, records)
+        if self.__records_since_snapshot > 0 or len(objects) < len(records):
+            self.__write_snapshot({key: records[key] for key in objects})
+        return [
+            obj for key, obj in objects.items() if key.startswith(ROOT_KEY_PREFIXES)
+        ]
+
+    def save(self, objects: Iterable[object]) -> None:
+        records: list[tuple[str, bytes | None]] = []
+        for obj in objects:
+            key = get_storage_key(obj)
+            if key is None:
+                raise ValueError("Object type is not storable")
+            records.append((key, dump_object(obj)))
+        self.__write_records(records)
+
+    def delete(self, objects: Iterable[object]) -> None:
+        records: list[tuple[str, bytes | None]] = []
+        for obj in objects:
+            key = get_storage_key(obj)
+            if key is None:
+                raise ValueError("Object type is not storable")
+            records.append((key, None))
+        self.__write_records(records)
+
+    def poll(self) -> list[tuple[object | None, object | None]]:
+        return []
+
+    def get_classroom_key_by_code(self, code: str) -> str | None:
+        return None
+
+    def is_blob_referenced(self, checksum: str) -> bool:
+        return False
+
+    def close(self) -> None:
+        with self.__writer_lock:
+            if self.__writer is not None:
+                self.__queue.put(None)
+                self.__writer.join()
+                self.__writer = None
+                atexit.unregister(self.close)
+        if not self.__log_file.closed:
+            self.__log_file.close()
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    email TEXT UNIQUE,
+    username TEXT UNIQUE,
+    code TEXT,
+    classroom_id TEXT,
+    item_id TEXT,
+    checksum TEXT
+);
+CREATE INDEX IF NOT EXISTS objects_code ON objects (code)
+    WHERE code IS NOT NULL;
+CREATE INDEX IF NOT EXISTS objects_classroom_id ON objects (classroom_id)
+    WHERE classroom_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS objects_item_id ON objects (item_id)
+    WHERE item_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS objects_checksum ON objects (checksum)
+    WHERE checksum IS NOT NULL;
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    worker_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+SQLITE_INSERT = """
+INSERT INTO objects (
+    key, payload, email, username, code, classroom_id, item_id, checksum, version
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+"""
+
+SQLITE_UPDATE = """
+UPDATE objects SET
+    payload = ?,
+    email = ?,
+    username = ?,
+    code = ?,
+    classroom_id = COALESCE(?, classroom_id),
+    item_id = COALESCE(?, item_id),
+    checksum = ?,
+    version = version + 1
+WHERE key = ? AND version = ?
+"""
+
+SQLITE_DELETE = "DELETE FROM objects WHERE key = ?"
+
+SQLITE_DELETE_CLASSROOM_CHILDREN = "DELETE FROM objects WHERE classroom_id = ?"
+
+SQLITE_DELETE_ITEM_CHILDREN = "DELETE FROM objects WHERE item_id = ?"
+
+SQLITE_SELECT_ALL = "SELECT key, payload, version FROM objects"
+
+SQLITE_SELECT_ONE = "SELECT payload, version FROM objects WHERE key = ?"
+
+SQLITE_INSERT_CHANGE = "INSERT INTO changes (key, worker_id) VALUES (?, ?)"
+
+SQLITE_SELECT_CHANGES = "SELECT seq, key, worker_id FROM changes WHERE seq > ?"
+
+SQLITE_SELECT_LAST_CHANGE = "SELECT last_insert_rowid()"
+
+SQLITE_SELECT_CHANGE_RANGE = "SELECT MIN(seq), MAX(seq) FROM changes"
+
+SQLITE_PRUNE_CHANGES = "DELETE FROM changes WHERE seq <= ?"
+
+SQLITE_CHANGES_RETAINED = 100000
+
+SQLITE_SELECT_CLASSROOM_BY_CODE = "SELECT key FROM objects WHERE code = ?"
+
+SQLITE_SELECT_BLOB_REFERENCE = "SELECT 1 FROM objects WHERE checksum = ? LIMIT 1"
+
+SQLITE_SELECT_FORMAT_VERSION = "SELECT value FROM metadata WHERE key = 'format_version'"
+
+SQLITE_INSERT_FORMAT_VERSION = (
+    "INSERT OR IGNORE INTO metadata (key, value) VALUES ('format_version', ?)"
+)
+
+
+class SQLiteRecords(dict[str, bytes]):
+    def __init__(
+        self, connection: sqlite3.Connection, versions: dict[str, int]
+    ) -> None:
+        super().__init__()
+        self.__connection = connection
+        self.__versions = versions
+
+    def __missing__(self, key: str) -> bytes:
+        row = self.__connection.execute(SQLITE_SELECT_ONE, (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        self.__versions[key] = row[1]
+        self[key] = row[0]
+        return row[0]
+
+
+class SQLiteStorage(Storage):
+    def __init__(self, path: Path) -> None:
+        path.mkdir(parents=True, exist_ok=True)
+        self.__database_path: Path = path / "classroom.sqlite3"
+        self.__connections = local()
+        self.__worker_id: str = str(uuid4())
+        self.__objects: dict[str, object] = {}
+        self.__versions: dict[str, int] = {}
+        self.__stale_keys: dict[str, None] = {}
+        self.__last_change: int = 0
+        connection = self.__get_connection()
+        connection.executescript(SQLITE_SCHEMA)
+        with connection:
+            connection.execute(SQLITE_INSERT_FORMAT_VERSION, (STORAGE_FORMAT_VERSION,))
+
+    def __get_connection(self) -> sqlite3.Connection:
+        connection: sqlite3.Connection | None = getattr(
+            self.__connections, "connection", None
+        )
+        if connection is None:
+            connection = sqlite3.connect(self.__database_path, cached_statements=256)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute("PRAGMA busy_timeout = 5000")
+            self.__connections.connection = connection
+        return connection
+
+    def __get_rows(self, objects: Iterable[object]) -> list[tuple]:
+        objects = list(objects)
+        classroom_id = next(
+            (obj.id for obj in objects if isinstance(obj, Classroom)), None
+        )
+        item = next((obj for obj in objects if isinstance(obj, BaseItem)), None)
+        rows: list[tuple] = []
+        for obj in objects:
+            key = get_storage_key(obj)
+            if key is None:
+                raise ValueError("Object type is not storable")
+            if isinstance(obj, Classroom):
+                classroom_id = obj.id
+            email = obj.email if isinstance(obj, User) else None
+            username = obj.username if isinstance(obj, User) else None
+            code = obj.code if isinstance(obj, Classroom) else None
+            parent_id = item_id = None
+            if isinstance(obj, BaseItem):
+                parent_id = obj.classroom_id
+            elif isinstance(obj, Topic):
+                parent_id = classroom_id
+            elif isinstance(obj, Submission):
+                submission_item = obj.item or item
+                if isinstance(submission_item, BaseItem):
+                    parent_id = submission_item.classroom_id
+                    item_id = submission_item.id
+            checksum = (
+                obj.checksum
+                if isinstance(obj, Attachment) and not obj.deleted
+                else None
+            )
+            rows.append(
+                (
+                    key,
+                    dump_object(obj),
+                    email,
+                    username,
+                    code,
+                    parent_id,
+                    item_id,
+                    checksum,
+                )
+            )
+        return rows
+
+    def __record_changes(self, connection: sqlite3.Connection, keys: list[str]) -> None:
+        connection.executemany(
+            SQLITE_INSERT_CHANGE, [(key, self.__worker_id) for key in keys]
+        )
+        (last_change,) = connection.execute(SQLITE_SELECT_LAST_CHANGE).fetchone()
+        if last_change % 1000 < len(keys):
+            connection.execute(
+                SQLITE_PRUNE_CHANGES, (last_change - SQLITE_CHANGES_RETAINED,)
+            )
+
+    def load(self) -> list[object]:
+        connection = self.__get_connection()
+        _, last_change = connection.execute(SQLITE_SELECT_CHANGE_RANGE).fetchone()
+        self.__last_change = last_change or 0
+        (format_version,) = connection.execute(SQLITE_SELECT_FORMAT_VERSION).fetchone()
+        if format_version != STORAGE_FORMAT_VERSION:
+            raise UnsupportedStorageFormat(
+                f"Unsupported storage format {format_version}"
+            )
+        records: dict[str, bytes] = {}
+        self.__versions = {}
+        for key, payload, version in connection.execute(SQLITE_SELECT_ALL):
+            records[key] = payload
+            self.__versions[key] = version
+        self.__objects = {}
+        self.__stale_keys = {}
+        for key in records:
+            if key.startswith(ROOT_KEY_PREFIXES):
+                load_object(key, self.__objects, records)
+        return [
+            obj
+            for key, obj in self.__objects.items()
+            if key.startswith(ROOT_KEY_PREFIXES)
+        ]
+
+    def __write_rows(self, connection: sqlite3.Connection, rows: list[tuple]) -> None:
+        for row in rows:
+            key = row[0]
+            version = self.__versions.get(key)
+            if version is None:
+                connection.execute(SQLITE_INSERT, row)
+            elif (
+                connection.execute(SQLITE_UPDATE, (*row[1:], key, version)).rowcount
+                == 0
+            ):
+                raise StorageConflict(f"{key} was changed by another worker")
+
+    def save(self, objects: Iterable[object]) -> None:
+        objects = list(objects)
+        rows = self.__get_rows(objects)
+        try:
+            with self.__get_connection() as connection:
+                self.__write_rows(connection, rows)
+                self.__record_changes(connection, [row[0] for row in rows])
+        except (sqlite3.IntegrityError, StorageConflict) as exp:
+            self.__stale_keys.update((row[0], None) for row in rows)
+            if isinstance(exp, StorageConflict):
+                raise
+            if "objects.email" in str(exp):
+                raise EmailAlreadyInUse("Email already in use") from exp
+            if "objects.username" in str(exp):
+                raise UsernameAlreadyInUse("Username already in use") from exp
+            if "objects.key" in str(exp):
+                raise StorageConflict("Object was created by another worker") from exp
+            raise
+        for row, obj in zip(rows, objects):
+            self.__objects[row[0]] = obj
+            self.__versions[row[0]] = self.__versions.get(row[0], 0) + 1
+
+    def delete(self, objects: Iterable[object]) -> None:
+        keys: list[str] = []
+        with self.__get_connection() as connection:
+            for obj in objects:
+                key = get_storage_key(obj)
+                if key is None:
+                    raise ValueError("Object type is not storable")
+                connection.execute(SQLITE_DELETE, (key,))
+                if isinstance(obj, Classroom):
+                    connection.execute(SQLITE_DELETE_CLASSROOM_CHILDREN, (obj.id,))
+                elif isinstance(obj, BaseItem):
+                    connection.execute(SQLITE_DELETE_ITEM_CHILDREN, (obj.id,))
+                keys.append(key)
+            self.__record_changes(connection, keys)
+        for key in keys:
+            self.__objects.pop(key, None)
+            self.__versions.pop(key, None)
+
+    def poll(self) -> list[tuple[object | None, object | None]]:
+        connection = self.__get_connection()
+        changes = connection.execute(
+            SQLITE_SELECT_CHANGES, (self.__last_change,)
+        ).fetchall()
+        if not changes and not self.__stale_keys:
+            return []
+        if changes and changes[0][0] > self.__last_change + 1:
+            first_change, _ = connection.execute(SQLITE_SELECT_CHANGE_RANGE).fetchone()
+            if first_change > self.__last_change + 1:
+                raise StorageOutOfSync("Change feed was pruned past this worker")
+        if changes:
+            self.__last_change = changes[-1][0]
+        keys = self.__stale_keys
+        self.__stale_keys = {}
+        keys.update(
+            (key, None)
+            for _, key, worker_id in changes
+            if worker_id != self.__worker_id
+        )
+        records = SQLiteRecords(connection, self.__versions)
+        updates: list[tuple[object | None, object | None]] = []
+        for key in keys:
+            current = self.__objects.get(key)
+            try:
+                payload = records[key]
+            except KeyError:
+                self.__objects.pop(key, None)
+                self.__versions.pop(key, None)
+                updates.append((current, None))
+                continue
+            fresh = ObjectUnpickler(payload, self.__objects, records).load()
+            if current is None:
+                self.__objects[key] = fresh
+            updates.append((current, fresh))
+        return updates
+
+    def get_classroom_key_by_code(self, code: str) -> str | None:
+        connection = self.__get_connection()
+        row = connection.execute(SQLITE_SELECT_CLASSROOM_BY_CODE, (code,)).fetchone()
+        return row[0] if row is not None else None
+
+    def is_blob_referenced(self, checksum: str) -> bool:
+        connection = self.__get_connection()
+        row = connection.execute(SQLITE_SELECT_BLOB_REFERENCE, (checksum,)).fetchone()
+        return row is not None
+
+    def close(self) -> None:
+        connection: sqlite3.Connection | None = getattr(
+            self.__connections, "connection", None
+        )
+        if connection is not None:
+            connection.close()
+            self.__connections.connection = None
+
+
+def get_storage() -> Storage:
+    if settings.storage_backend == StorageBackend.LOG:
+        return LogStorage(settings.storage_path, settings.storage_snapshot_interval)
+    if settings.storage_backend == StorageBackend.SQLITE:
+        return SQLiteStorage(settings.storage_path)
+    return MemoryStorage()
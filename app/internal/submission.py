@@ -1,17 +1,34 @@
+from typing import TYPE_CHECKING
 from uuid import uuid4
 
 from .attachment import Attachment
 from .comment import Comment
+from .compact import get_slot_names
 from .user import User
 
+if TYPE_CHECKING:
+    from .items import SubmissionsMixin
+
 
 class Submission:
+    __slots__ = ("__id", "__owner", "__attachments", "__point", "__comments", "__item")
+
     def __init__(self, owner: User, attachments: list[Attachment]) -> None:
         self.__id: str = str(uuid4())
         self.__owner: User = owner
         self.__attachments: list[Attachment] = attachments
         self.__point: int | None = None
         self.__comments: list[Comment] = []
+        self.__item: "SubmissionsMixin | None" = None
+
+    def __getstate__(self) -> tuple[None, dict]:
+        state = {
+            name: getattr(self, name)
+            for name in get_slot_names(type(self))
+            if hasattr(self, name)
+        }
+        state["_Submission__item"] = None
+        return None, state
 
     @property
     def id(self) -> str:
@@ -29,12 +46,22 @@ class Submission:
     def point(self) -> int | None:
         return self.__point
 
+    @property
+    def item(self) -> "SubmissionsMixin | None":
+        return self.__item
+
+    @item.setter
+    def item(self, item: "SubmissionsMixin | None") -> None:
+        self.__item = item
+
     @attachments.setter
     def attachments(self, attachments: list[Attachment]) -> None:
         self.__attachments = attachments
 
     @point.setter
     def point(self, point: int | None) -> None:
+        if self.__item is not None and (self.__point is None) != (point is None):
+            self.__item.update_graded_count(1 if point is not None else -1)
         self.__point = point
 
     def to_dict(self) -> dict:
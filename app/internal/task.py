@@ -5,6 +5,18 @@ from .classroom import Classroom
 from .items import Assignment, MultipleChoiceQuestion, Question
 from .user import User
 
+GRADEBOOK_COLUMNS = [
+    "student_id",
+    "username",
+    "email",
+    "item_id",
+    "title",
+    "due_date",
+    "max_point",
+    "status",
+    "point",
+]
+
 
 class Task(ABC):
     def __init__(
@@ -33,7 +45,9 @@ class ToDoTask(Task):
     ) -> None:
         super().__init__(classroom=classroom, item=item, owner=owner)
         self.__status: TaskStatus
+        self.__point: int | None = None
         if submission := self._item.get_submission_by_owner(self._owner):
+            self.__point = submission.point
             if submission.point is not None:
                 self.__status = TaskStatus.GRADED
             else:
@@ -41,6 +55,14 @@ class ToDoTask(Task):
         else:
             self.__status = TaskStatus.ASSIGNED
 
+    @property
+    def status(self) -> TaskStatus:
+        return self.__status
+
+    @property
+    def point(self) -> int | None:
+        return self.__point
+
     def to_dict(self) -> dict:
         return {
             "classroom_id": self._classroom.id,
@@ -49,8 +71,25 @@ class ToDoTask(Task):
             "classroom_name": self._classroom.name,
             "created_at": self._item.created_at.isoformat(),
             "edited_at": self._item.edited_at.isoformat(),
-            "due_date": self._item.due_date,
+            "due_date": (
+                self._item.due_date.isoformat() if self._item.due_date else None
+            ),
+            "status": self.__status.value,
+        }
+
+    def to_gradebook_dict(self) -> dict:
+        return {
+            "student_id": self._owner.id,
+            "username": self._owner.username,
+            "email": self._owner.email,
+            "item_id": self._item.id,
+            "title": self._item.title,
+            "due_date": (
+                self._item.due_date.isoformat() if self._item.due_date else None
+            ),
+            "max_point": self._item.point,
             "status": self.__status.value,
+            "point": self.__point,
         }
 
 
@@ -62,11 +101,13 @@ class ToReviewTask(Task):
         owner: User,
     ) -> None:
         super().__init__(classroom=classroom, item=item, owner=owner)
-        total_assigned_count = len(item.assigned_to_students or classroom.students)
-        total_turned_in_count = len(item.submissions)
-        total_graded_count = len(
-            [submission.point is not None for submission in item.submissions]
+        total_assigned_count = (
+            len(item.assigned_to_students)
+            if item.assigned_to_students
+            else classroom.student_count
         )
+        total_turned_in_count = item.submission_count
+        total_graded_count = item.graded_count
         self.__turned_in_count = total_turned_in_count - total_graded_count
         self.__assigned_count = total_assigned_count - total_turned_in_count
         self.__graded_count = total_graded_count
@@ -79,6 +120,9 @@ class ToReviewTask(Task):
             "classroom_name": self._classroom.name,
             "created_at": self._item.created_at.isoformat(),
             "edited_at": self._item.edited_at.isoformat(),
+            "due_date": (
+                self._item.due_date.isoformat() if self._item.due_date else None
+            ),
             "turned_in_count": self.__turned_in_count,
             "assigned_count": self.__assigned_count,
             "graded_count": self.__graded_count,
@@ -0,0 +1,33 @@
+from collections import OrderedDict
+from threading import Lock
+from time import time
+
+from .user import User
+
+
+class TokenCache:
+    def __init__(self, max_size: int, ttl: int) -> None:
+        self.__max_size: int = max_size
+        self.__ttl: int = ttl
+        self.__entries: OrderedDict[str, tuple[User, str, float]] = OrderedDict()
+        self.__lock: Lock = Lock()
+
+    def get(self, token: str) -> User | None:
+        with self.__lock:
+            entry = self.__entries.get(token)
+            if entry is None:
+                return None
+            user, hashed_password, expire_at = entry
+            if expire_at <= time() or user.hashed_password != hashed_password:
+                del self.__entries[token]
+                return None
+            self.__entries.move_to_end(token)
+            return user
+
+    def put(self, token: str, user: User, token_expire_at: float) -> None:
+        expire_at = min(token_expire_at, time() + self.__ttl)
+        with self.__lock:
+            self.__entries[token] = (user, user.hashed_password, expire_at)
+            self.__entries.move_to_end(token)
+            if len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
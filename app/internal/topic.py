@@ -1,6 +1,9 @@
 from uuid import uuid4
 
+
 class Topic:
+    __slots__ = ("__id", "__name")
+
     def __init__(self, name: str) -> None:
         self.__id: str = str(uuid4())
         self.__name: str = name
@@ -1,9 +1,12 @@
 from uuid import uuid4
 
 from .avatar import Avatar
+from .fragment_cache import fragment_cache
 
 
 class User:
+    __slots__ = ("__id", "__username", "__email", "__hashed_password", "__avatar")
+
     def __init__(self, username: str, email: str, hashed_password: str) -> None:
         self.__id: str = str(uuid4())
         self.__username: str = username
@@ -34,10 +37,12 @@ class User:
     @username.setter
     def username(self, username: str) -> None:
         self.__username = username
+        fragment_cache.invalidate_dependents(self.__id)
 
     @email.setter
     def email(self, email: str) -> None:
         self.__email = email
+        fragment_cache.invalidate_dependents(self.__id)
 
     @hashed_password.setter
     def hashed_password(self, hashed_password: str) -> None:
@@ -1,19 +1,31 @@
+import asyncio
 import signal
 from contextlib import asynccontextmanager
-from os import mkdir
+from os import makedirs, mkdir
 from shutil import rmtree
+from threading import Event
 from types import FrameType
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from .config.config import get_settings
+from .constants.enums import StorageBackend
+from .internal.controller import controller
+from .internal.json_response import FastJSONResponse
 from .routers import attachment, auth, classroom, tasks, user
 
 settings = get_settings()
 
 
+def clear_file_storage() -> None:
+    rmtree(settings.attachments_storage_path, ignore_errors=True)
+    mkdir(settings.attachments_storage_path)
+    rmtree(settings.avatar_images_storage_path, ignore_errors=True)
+    mkdir(settings.avatar_images_storage_path)
+
+
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     default_sigint_handler = signal.getsignal(signal.SIGINT)
@@ -22,18 +34,29 @@ async def lifespan(_: FastAPI):
         default_sigint_handler(signum, frame)  # type: ignore
 
     signal.signal(signal.SIGINT, terminate_now)  # type: ignore
-    rmtree(settings.attachments_storage_path, ignore_errors=True)
-    mkdir(settings.attachments_storage_path)
-    rmtree(settings.avatar_images_storage_path, ignore_errors=True)
-    mkdir(settings.avatar_images_storage_path)
+    if settings.storage_backend == StorageBackend.MEMORY:
+        clear_file_storage()
+    else:
+        makedirs(settings.attachments_storage_path, exist_ok=True)
+        makedirs(settings.avatar_images_storage_path, exist_ok=True)
+    prerender_stop_event = Event()
+    prerender_task = None
+    if settings.avatar_prerender_workers > 0:
+        prerender_task = asyncio.create_task(
+            controller.prerender_avatars(
+                settings.avatar_prerender_workers, prerender_stop_event
+            )
+        )
     yield
-    rmtree(settings.attachments_storage_path, ignore_errors=True)
-    mkdir(settings.attachments_storage_path)
-    rmtree(settings.avatar_images_storage_path, ignore_errors=True)
-    mkdir(settings.avatar_images_storage_path)
+    prerender_stop_event.set()
+    if prerender_task is not None:
+        await prerender_task
+    controller.close()
+    if settings.storage_backend == StorageBackend.MEMORY:
+        clear_file_storage()
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
@@ -47,6 +70,12 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def refresh_controller(request: Request, call_next):
+    controller.refresh()
+    return await call_next(request)
+
+
 app.include_router(auth.router)
 app.include_router(attachment.router)
 app.include_router(classroom.router)
@@ -68,6 +68,16 @@ class CreateClassroomItemModel(BaseModel):
     choices: Annotated[list[str], MinLen(1)] | None
 
 
+class BulkCreateClassroomItemsModel(BaseModel):
+    items: Annotated[
+        list[CreateClassroomItemModel], MinLen(1), MaxLen(settings.bulk_max_rows)
+    ]
+
+
+class BulkAddStudentsToClassroomModel(BaseModel):
+    emails: Annotated[list[EmailStr], MinLen(1), MaxLen(settings.bulk_max_rows)]
+
+
 class AddCommentModel(BaseModel):
     comment: Annotated[str, Field(min_length=1, max_length=512)]
 
@@ -78,3 +88,11 @@ class SubmissionModel(BaseModel):
 
 class GradeSubmissionModel(BaseModel):
     point: Annotated[int, Field(ge=0)] | None
+
+
+class BulkGradeSubmissionsModel(BaseModel):
+    points: Annotated[
+        dict[str, Annotated[int, Field(ge=0)] | None],
+        MinLen(1),
+        MaxLen(settings.bulk_max_rows),
+    ]
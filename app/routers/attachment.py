@@ -1,9 +1,11 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile, status
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, status
 
 from ..dependencies.authentication import get_current_user
+from ..exceptions.attachment import AttachmentInUse, AttachmentTooLarge
 from ..internal.controller import controller
+from ..internal.file_response import create_file_response
 from ..internal.user import User
 
 router = APIRouter(
@@ -17,12 +19,17 @@ router = APIRouter(
 async def upload_file(
     file: UploadFile, user: Annotated[User, Depends(get_current_user)]
 ):
-    attachment = controller.create_attachment(
-        file.filename or "unknown",
-        file.content_type or "application/unknown",
-        file.file,
-        user,
-    )
+    try:
+        attachment = await controller.create_attachment(
+            file.filename or "unknown",
+            file.content_type or "application/unknown",
+            file,
+            user,
+        )
+    except AttachmentTooLarge as exp:
+        raise HTTPException(
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, "Attachment is too large"
+        ) from exp
     return attachment.to_dict()
 
 
@@ -35,12 +42,38 @@ async def get_file_info(attachment_id: str):
 
 
 @router.get("/{attachment_id}/data")
-async def get_file_data(attachment_id: str):
+async def get_file_data(attachment_id: str, request: Request):
     attachment = controller.get_attachment_by_id(attachment_id)
     if attachment is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Attachment not found")
-    return Response(
-        attachment.data.getvalue(),
-        media_type=attachment.content_type,
+    return await create_file_response(
+        request,
+        attachment.path,
+        attachment.content_type,
+        attachment.checksum,
         headers={"Content-Disposition": "inline", "filename": attachment.name},
     )
+
+
+@router.delete("/{attachment_id}")
+async def delete_file(
+    attachment_id: str, user: Annotated[User, Depends(get_current_user)]
+):
+    attachment = controller.get_attachment_by_id(attachment_id)
+    if attachment is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Attachment not found")
+    if attachment.owner != user:
+        raise HTTPException(
+            status.HTTP_403_FORBIDDEN, "User is not the attachment owner"
+        )
+    try:
+        deleted = controller.delete_attachment(attachment)
+    except AttachmentInUse as exp:
+        raise HTTPException(
+            status.HTTP_409_CONFLICT, "Attachment is still in use"
+        ) from exp
+    if not deleted:
+        raise HTTPException(
+            status.HTTP_500_INTERNAL_SERVER_ERROR, "Failed to delete attachment"
+        )
+    return {"message": "Attachment deleted successfully"}
@@ -9,7 +9,7 @@ from ..dependencies.authentication import (
     get_current_user,
     get_password_hash,
 )
-from ..exceptions.user import EmailAlreadyInUse
+from ..exceptions.user import EmailAlreadyInUse, UsernameAlreadyInUse
 from ..internal.controller import controller
 from ..models.auth import RegisterModel
 
@@ -22,14 +22,18 @@ router = APIRouter(
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 async def register(body: RegisterModel):
+    password_hash = await get_password_hash(body.password)
     try:
-        user = controller.create_user(
-            body.username, body.email, get_password_hash(body.password)
-        )
+        user = controller.create_user(body.username, body.email, password_hash)
     except EmailAlreadyInUse as exp:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email is already in use"
         ) from exp
+    except UsernameAlreadyInUse as exp:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username is already in use",
+        ) from exp
     return {
         "access_token": create_access_token(data={"id": user.id}),
         "token_type": "bearer",
@@ -38,7 +42,7 @@ async def register(body: RegisterModel):
 
 @router.post("/login")
 async def login(body: Annotated[OAuth2PasswordRequestForm, Depends()]):
-    user = authenticate_user(body.username, body.password)
+    user = await authenticate_user(body.username, body.password)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid credentials"
@@ -2,10 +2,11 @@ import os
 from functools import lru_cache
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 
 from ..config.config import get_settings
-from ..constants.enums import ClassroomItemType
+from ..constants.enums import ClassroomItemType, GradebookFormat
 from ..dependencies.authentication import get_current_user
 from ..dependencies.classroom import (
     get_classroom_from_path,
@@ -15,14 +16,23 @@ from ..dependencies.classroom import (
     verify_user_is_classroom_owner,
     verify_user_is_student,
 )
+from ..exceptions.classroom import InvalidCode, UserAlreadyInClassroom
+from ..internal.attachment import Attachment
 from ..internal.classroom import Classroom
 from ..internal.controller import controller
+from ..internal.export import iter_csv, iter_jsonl
 from ..internal.items import BaseItem, SubmissionsMixin
+from ..internal.json_response import FastJSONResponse
 from ..internal.submission import Submission
+from ..internal.task import GRADEBOOK_COLUMNS
+from ..internal.topic import Topic
 from ..internal.user import User
 from ..models.classroom import (
     AddCommentModel,
     AddStudentToClassroomModel,
+    BulkAddStudentsToClassroomModel,
+    BulkGradeSubmissionsModel,
+    BulkCreateClassroomItemsModel,
     CreateClassroomItemModel,
     CreateClassroomModel,
     CreateClassroomTopicModel,
@@ -59,7 +69,12 @@ def get_banner_images_cached():
 async def get_classrooms(user: Annotated[User, Depends(get_current_user)]):
     classrooms = controller.get_classrooms_for_user(user)
     classrooms.reverse()
-    return [classroom.to_dict(filter_item_for_user=user) for classroom in classrooms]
+    return FastJSONResponse(
+        [
+            classroom.to_summary_dict(filter_item_for_user=user)
+            for classroom in classrooms
+        ]
+    )
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
@@ -69,20 +84,24 @@ async def create_classroom(
     classroom = controller.create_classroom(
         user, body.name, body.section, body.subject, body.room
     )
-    return classroom.to_dict(filter_item_for_user=user)
+    return classroom.to_dict()
 
 
 @router.put("")
 async def join_classroom(
     body: JoinClassroomModel, user: Annotated[User, Depends(get_current_user)]
 ):
-    classroom = controller.get_classroom_by_code(body.classroom_code)
-    if classroom is None:
-        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid classroom code")
-    if user in classroom:
-        raise HTTPException(status.HTTP_400_BAD_REQUEST, "User already in classroom")
-    classroom.add_student(user)
-    return classroom.to_dict(filter_item_for_user=user)
+    try:
+        classroom = controller.join_classroom_by_code(user, body.classroom_code)
+    except InvalidCode as exp:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST, "Invalid classroom code"
+        ) from exp
+    except UserAlreadyInClassroom as exp:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST, "User already in classroom"
+        ) from exp
+    return classroom.to_dict()
 
 
 @router.get("/banner-images")
@@ -94,10 +113,71 @@ async def get_banner_images():
 async def get_classroom(
     user: Annotated[User, Depends(get_current_user)],
     classroom: Annotated[Classroom, Depends(get_classroom_from_path)],
+    include_lists: bool = True,
 ):
     include_code = user == classroom.owner
-    return classroom.to_dict(
-        include_code=include_code, include_lists=True, filter_item_for_user=user
+    return FastJSONResponse(
+        classroom.to_json(
+            include_code=include_code,
+            include_lists=include_lists,
+            filter_item_for_user=user,
+        )
+    )
+
+
+@router.get(
+    "/{classroom_id}/students", dependencies=[Depends(verify_user_in_classroom)]
+)
+async def get_classroom_students(
+    classroom: Annotated[Classroom, Depends(get_classroom_from_path)],
+):
+    return FastJSONResponse([student.to_dict() for student in classroom.students])
+
+
+@router.get("/{classroom_id}/topics", dependencies=[Depends(verify_user_in_classroom)])
+async def get_classroom_topics(
+    classroom: Annotated[Classroom, Depends(get_classroom_from_path)],
+):
+    return FastJSONResponse([topic.to_dict() for topic in reversed(classroom.topics)])
+
+
+def parse_item_cursor(cursor: str) -> tuple[int, str]:
+    item_cursor, _, item_id = cursor.partition(":")
+    try:
+        return int(item_cursor), item_id
+    except ValueError as exp:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid cursor") from exp
+
+
+@router.get("/{classroom_id}/items", dependencies=[Depends(verify_user_in_classroom)])
+async def get_classroom_items(
+    user: Annotated[User, Depends(get_current_user)],
+    classroom: Annotated[Classroom, Depends(get_classroom_from_path)],
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    topic_id: str | None = None,
+    item_type: ClassroomItemType | None = None,
+):
+    if topic_id:
+        topic = classroom.get_topic_by_id(topic_id)
+        if topic is None:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid topic ID")
+    else:
+        topic = None
+    items, next_cursor = classroom.get_items_page(
+        parse_item_cursor(cursor) if cursor else None,
+        limit,
+        topic,
+        item_type,
+        filter_item_for_user=user,
+    )
+    return FastJSONResponse(
+        {
+            "items": [item.to_json() for item in items],
+            "next_cursor": (
+                f"{next_cursor[0]}:{next_cursor[1]}" if next_cursor else None
+            ),
+        }
     )
 
 
@@ -111,10 +191,38 @@ async def add_student_to_classroom(
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid email")
     if user in classroom:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "User already in classroom")
-    classroom.add_student(user)
+    controller.add_student_to_classroom(classroom, user)
     return {"message": "Student added successfully"}
 
 
+@router.post(
+    "/{classroom_id}/students",
+    dependencies=[Depends(verify_user_is_classroom_owner)],
+)
+async def add_students_to_classroom(
+    body: BulkAddStudentsToClassroomModel,
+    classroom: Annotated[Classroom, Depends(get_classroom_from_path)],
+):
+    students = []
+    errors = []
+    emails = set()
+    for index, email in enumerate(body.emails):
+        user = controller.get_user_by_email(email)
+        if user is None:
+            errors.append({"index": index, "message": "Invalid email"})
+        elif email in emails:
+            errors.append({"index": index, "message": "Duplicate email"})
+        elif user in classroom:
+            errors.append({"index": index, "message": "User already in classroom"})
+        else:
+            students.append(user)
+        emails.add(email)
+    if errors:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, errors)
+    controller.add_students_to_classroom(classroom, students)
+    return {"message": "Students added successfully"}
+
+
 @router.patch(
     "/{classroom_id}",
     dependencies=[Depends(get_current_user), Depends(verify_user_is_classroom_owner)],
@@ -123,12 +231,17 @@ async def update_classroom(
     body: UpdateClassroomModel,
     classroom: Annotated[Classroom, Depends(get_classroom_from_path)],
 ):
-    classroom.name = body.name
-    classroom.section = body.section
-    classroom.subject = body.subject
-    classroom.room = body.room
-    classroom.banner_path = body.banner_path
-    classroom.theme_color = body.theme_color
+
+    def update_fields() -> tuple[Classroom]:
+        classroom.name = body.name
+        classroom.section = body.section
+        classroom.subject = body.subject
+        classroom.room = body.room
+        classroom.banner_path = body.banner_path
+        classroom.theme_color = body.theme_color
+        return (classroom,)
+
+    controller.update(update_fields)
     return classroom.to_dict()
 
 
@@ -155,112 +268,166 @@ async def create_classroom_topic(
     body: CreateClassroomTopicModel,
     classroom: Annotated[Classroom, Depends(get_classroom_from_path)],
 ):
-    topic = classroom.create_topic(body.name)
+
+    def add_topic() -> tuple[Topic, Classroom]:
+        return classroom.create_topic(body.name), classroom
+
+    topic, _ = controller.update(add_topic)
     return topic.to_dict()
 
 
-@router.post(
-    "/{classroom_id}/items",
-    status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(get_current_user), Depends(verify_user_is_classroom_owner)],
-)
-async def create_classroom_item(
-    body: CreateClassroomItemModel,
-    classroom: Annotated[Classroom, Depends(get_classroom_from_path)],
-):
-    item_type = body.type
+def validate_classroom_item(
+    classroom: Classroom, body: CreateClassroomItemModel
+) -> tuple[Topic | None, list[Attachment], list[User] | None]:
     if body.topic_id:
         topic = classroom.get_topic_by_id(body.topic_id)
         if topic is None:
             raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid topic ID")
     else:
         topic = None
-    attachments = list(map(controller.get_attachment_by_id, body.attachments_id))
-    if None in attachments:
-        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid attachment ID")
-    attachments = [attachment for attachment in attachments if attachment]
+    attachments, missing_ids = controller.get_attachments_by_ids(body.attachments_id)
+    if missing_ids:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            f"Invalid attachment ID: {', '.join(missing_ids)}",
+        )
     if body.assigned_to_students_id:
-        assigned_to_students = list(
-            map(controller.get_user_by_id, body.assigned_to_students_id)
+        assigned_to_students, missing_ids = controller.get_users_by_ids(
+            body.assigned_to_students_id
         )
-        if None in assigned_to_students:
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid student ID")
-        assigned_to_students = [student for student in assigned_to_students if student]
+        if missing_ids:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                f"Invalid student ID: {', '.join(missing_ids)}",
+            )
+        for student in assigned_to_students:
+            if student == classroom.owner or student not in classroom:
+                raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid data")
     else:
         assigned_to_students = None
-    try:
-        if item_type == ClassroomItemType.ANNOUNCEMENT:
-            announcement_text = body.announcement_text
-            if announcement_text is None:
-                raise HTTPException(
-                    status.HTTP_400_BAD_REQUEST, "Announcement text is required"
-                )
-            announcement = classroom.create_announcement(
-                attachments, assigned_to_students, announcement_text
-            )
-            return announcement.to_dict()
-
-        title = body.title
-        if title is None:
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Title is required")
-        description = body.description
-
-        if item_type == ClassroomItemType.MATERIAL:
-            material = classroom.create_material(
-                topic, attachments, assigned_to_students, title, description
-            )
-            return material.to_dict()
-
-        due_date = body.due_date
-        point = body.point
-
-        if item_type == ClassroomItemType.ASSIGNMENT:
-            assignment = classroom.create_assignment(
-                topic,
-                attachments,
-                assigned_to_students,
-                title,
-                description,
-                due_date,
-                point,
-            )
-            return assignment.to_dict()
-
-        if item_type == ClassroomItemType.QUESTION:
-            question = classroom.create_question(
-                topic,
-                attachments,
-                assigned_to_students,
-                title,
-                description,
-                due_date,
-                point,
-            )
-            return question.to_dict()
-
-        choices = body.choices
-        if choices is None:
+    if body.type == ClassroomItemType.ANNOUNCEMENT:
+        if body.announcement_text is None:
             raise HTTPException(
-                status.HTTP_400_BAD_REQUEST, "At least one choice is required"
+                status.HTTP_400_BAD_REQUEST, "Announcement text is required"
             )
+        return topic, attachments, assigned_to_students
+    if body.title is None:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Title is required")
+    if body.type == ClassroomItemType.MULTIPLE_CHOICE_QUESTION and body.choices is None:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST, "At least one choice is required"
+        )
+    return topic, attachments, assigned_to_students
 
-        if item_type == ClassroomItemType.MULTIPLE_CHOICE_QUESTION:
-            multiple_choice_question = classroom.create_multiple_choice_question(
-                topic,
-                attachments,
-                assigned_to_students,
-                title,
-                description,
-                due_date,
-                point,
-                choices,
-            )
-            return multiple_choice_question.to_dict()
 
-        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid item type")
+def create_item_in_classroom(
+    classroom: Classroom,
+    body: CreateClassroomItemModel,
+    topic: Topic | None,
+    attachments: list[Attachment],
+    assigned_to_students: list[User] | None,
+) -> BaseItem:
+    item_type = body.type
+    if item_type == ClassroomItemType.ANNOUNCEMENT:
+        return classroom.create_announcement(
+            attachments, assigned_to_students, body.announcement_text or ""
+        )
+    title = body.title or ""
+    description = body.description
+    if item_type == ClassroomItemType.MATERIAL:
+        return classroom.create_material(
+            topic, attachments, assigned_to_students, title, description
+        )
+    due_date = body.due_date
+    point = body.point
+    if item_type == ClassroomItemType.ASSIGNMENT:
+        return classroom.create_assignment(
+            topic,
+            attachments,
+            assigned_to_students,
+            title,
+            description,
+            due_date,
+            point,
+        )
+    if item_type == ClassroomItemType.QUESTION:
+        return classroom.create_question(
+            topic,
+            attachments,
+            assigned_to_students,
+            title,
+            description,
+            due_date,
+            point,
+        )
+    if item_type == ClassroomItemType.MULTIPLE_CHOICE_QUESTION:
+        return classroom.create_multiple_choice_question(
+            topic,
+            attachments,
+            assigned_to_students,
+            title,
+            description,
+            due_date,
+            point,
+            body.choices or [],
+        )
+    raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid item type")
 
+
+@router.post(
+    "/{classroom_id}/items",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(get_current_user), Depends(verify_user_is_classroom_owner)],
+)
+async def create_classroom_item(
+    body: CreateClassroomItemModel,
+    classroom: Annotated[Classroom, Depends(get_classroom_from_path)],
+):
+    topic, attachments, assigned_to_students = validate_classroom_item(classroom, body)
+    try:
+        item = create_item_in_classroom(
+            classroom, body, topic, attachments, assigned_to_students
+        )
     except ValueError as exp:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid data") from exp
+    controller.save(item)
+    return item.to_dict()
+
+
+@router.post(
+    "/{classroom_id}/items/bulk",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(get_current_user), Depends(verify_user_is_classroom_owner)],
+)
+async def create_classroom_items(
+    body: BulkCreateClassroomItemsModel,
+    classroom: Annotated[Classroom, Depends(get_classroom_from_path)],
+):
+    validated_items = []
+    errors = []
+    for index, item_body in enumerate(body.items):
+        try:
+            validated_items.append(
+                (index, item_body, *validate_classroom_item(classroom, item_body))
+            )
+        except HTTPException as exp:
+            errors.append({"index": index, "message": exp.detail})
+    if errors:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, errors)
+    items = []
+    for index, *validated_item in validated_items:
+        try:
+            items.append(create_item_in_classroom(classroom, *validated_item))
+        except ValueError as exp:
+            errors.append({"index": index, "message": str(exp)})
+    if errors:
+        for item in items:
+            classroom.delete_item(item)
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, errors)
+    controller.save(*items)
+    return FastJSONResponse(
+        [item.to_json() for item in items], status_code=status.HTTP_201_CREATED
+    )
 
 
 @router.get(
@@ -271,12 +438,8 @@ async def get_classroom_item(
     classroom: Annotated[Classroom, Depends(get_classroom_from_path)],
     item: Annotated[BaseItem, Depends(get_item_from_path)],
 ):
-    if (
-        item.assigned_to_students is None
-        or user in item.assigned_to_students
-        or user == classroom.owner
-    ):
-        return item.to_dict()
+    if classroom.is_item_visible_to(item, user):
+        return FastJSONResponse(item.to_json())
     else:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Item not found")
 
@@ -293,6 +456,7 @@ async def delete_classroom_item(
         raise HTTPException(
             status.HTTP_500_INTERNAL_SERVER_ERROR, "Failed to delete item"
         )
+    controller.delete(item)
     return {"message": "Item deleted successfully"}
 
 
@@ -306,7 +470,12 @@ async def add_comment_to_classroom_item(
     user: Annotated[User, Depends(get_current_user)],
     item: Annotated[BaseItem, Depends(get_item_from_path)],
 ):
-    item.create_comment(user, body.comment)
+
+    def add_comment() -> tuple[BaseItem]:
+        item.create_comment(user, body.comment)
+        return (item,)
+
+    controller.update(add_comment)
     return item.to_dict()
 
 
@@ -321,7 +490,7 @@ async def get_classroom_item_submissions(
         raise HTTPException(
             status.HTTP_400_BAD_REQUEST, "Item type does not support submission"
         )
-    return [submission.to_dict() for submission in item.submissions]
+    return FastJSONResponse([submission.to_dict() for submission in item.submissions])
 
 
 @router.get(
@@ -356,11 +525,18 @@ async def add_classroom_item_submission(
         raise HTTPException(
             status.HTTP_400_BAD_REQUEST, "Item type does not support submission"
         )
-    attachments = list(map(controller.get_attachment_by_id, body.attachments_id))
-    if None in attachments:
-        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid attachment ID")
-    attachments = [attachment for attachment in attachments if attachment]
-    return item.create_submission(user, attachments).to_dict()
+    attachments, missing_ids = controller.get_attachments_by_ids(body.attachments_id)
+    if missing_ids:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            f"Invalid attachment ID: {', '.join(missing_ids)}",
+        )
+
+    def add_submission() -> tuple[Submission, BaseItem]:
+        return item.create_submission(user, attachments), item
+
+    submission, _ = controller.update(add_submission)
+    return submission.to_dict()
 
 
 @router.put(
@@ -369,9 +545,74 @@ async def add_classroom_item_submission(
 )
 async def grade_classroom_item_submission(
     body: GradeSubmissionModel,
+    item: Annotated[BaseItem, Depends(get_item_from_path)],
     submission: Annotated[Submission, Depends(get_submission_from_path)],
 ):
     if submission is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Submission not found")
-    submission.point = body.point
+
+    def grade_submission() -> tuple[Submission, BaseItem]:
+        submission.point = body.point
+        return submission, item
+
+    controller.update(grade_submission)
     return submission.to_dict()
+
+
+@router.put(
+    "/{classroom_id}/items/{item_id}/submissions",
+    dependencies=[Depends(get_current_user), Depends(verify_user_is_classroom_owner)],
+)
+async def grade_classroom_item_submissions(
+    body: BulkGradeSubmissionsModel,
+    item: Annotated[BaseItem, Depends(get_item_from_path)],
+):
+    if not isinstance(item, SubmissionsMixin):
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST, "Item type does not support submission"
+        )
+    submissions = []
+    errors = []
+    for submission_id in body.points:
+        submission = item.get_submission_by_id(submission_id)
+        if submission is None:
+            errors.append(
+                {"submission_id": submission_id, "message": "Submission not found"}
+            )
+        else:
+            submissions.append(submission)
+    if errors:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, errors)
+
+    def grade_submissions() -> tuple[Submission | BaseItem, ...]:
+        for submission in submissions:
+            submission.point = body.points[submission.id]
+        return (*submissions, item)
+
+    controller.update(grade_submissions)
+    return FastJSONResponse([submission.to_dict() for submission in submissions])
+
+
+@router.get(
+    "/{classroom_id}/gradebook",
+    dependencies=[Depends(get_current_user), Depends(verify_user_is_classroom_owner)],
+)
+async def export_classroom_gradebook(
+    classroom: Annotated[Classroom, Depends(get_classroom_from_path)],
+    export_format: Annotated[GradebookFormat, Query(alias="format")] = (
+        GradebookFormat.CSV
+    ),
+):
+    rows = controller.iter_gradebook(classroom)
+    if export_format == GradebookFormat.CSV:
+        content = iter_csv(rows, GRADEBOOK_COLUMNS)
+        media_type = "text/csv"
+    else:
+        content = iter_jsonl(rows)
+        media_type = "application/x-ndjson"
+    filename = f"gradebook-{classroom.id}.{export_format.value}"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"content-disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,12 +1,17 @@
+from datetime import datetime, timedelta
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
+from ..config.config import get_settings
 from ..constants.enums import TaskType
 from ..dependencies.authentication import get_current_user
 from ..internal.controller import controller
+from ..internal.json_response import FastJSONResponse
 from ..internal.user import User
 
+settings = get_settings()
+
 router = APIRouter(
     prefix="/tasks",
     tags=["Tasks"],
@@ -15,6 +20,36 @@ router = APIRouter(
 
 
 @router.get("/@me")
-async def get_tasks(task_type: TaskType, user: Annotated[User, Depends(get_current_user)]):
-    tasks = controller.get_tasks_for_user(user, task_type)
-    return [task.to_dict() for task in tasks]
+async def get_tasks(
+    task_type: TaskType,
+    user: Annotated[User, Depends(get_current_user)],
+    limit: Annotated[int | None, Query(ge=1)] = None,
+    due_after: datetime | None = None,
+    due_before: datetime | None = None,
+):
+    tasks = controller.get_tasks_for_user(user, task_type, limit, due_after, due_before)
+    return FastJSONResponse([task.to_dict() for task in tasks])
+
+
+@router.get("/@me/due")
+async def get_due_tasks(
+    task_type: TaskType,
+    user: Annotated[User, Depends(get_current_user)],
+    start: datetime | None = None,
+    end: datetime | None = None,
+):
+    now = datetime.now().astimezone()
+    window = timedelta(days=settings.due_tasks_window_days)
+    start = start or now - window
+    end = end or now + window
+    if start.timestamp() >= end.timestamp():
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid time range")
+    overdue_tasks, upcoming_tasks = controller.get_due_tasks_for_user(
+        user, task_type, start, end
+    )
+    return FastJSONResponse(
+        {
+            "overdue": [task.to_dict() for task in overdue_tasks],
+            "upcoming": [task.to_dict() for task in upcoming_tasks],
+        }
+    )
@@ -1,6 +1,6 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
 from ..dependencies.authentication import (
     get_current_user,
@@ -8,7 +8,10 @@ from ..dependencies.authentication import (
     verify_password,
 )
 from ..dependencies.user import get_user_from_path
+from ..exceptions.user import EmailAlreadyInUse, UsernameAlreadyInUse
+from ..internal.avatar import AVATAR_FULL_SIZE, AVATAR_SIZES
 from ..internal.controller import controller
+from ..internal.file_response import etag_matches
 from ..internal.user import User
 from ..models.user import UpdateUserModel
 
@@ -38,12 +41,21 @@ async def update_me(
         and controller.get_user_by_username(body.username) != user
     ):
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Username already in use")
-    if not verify_password(user.hashed_password, body.old_password):
+    if not await verify_password(user.hashed_password, body.old_password):
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Old password is incorrect")
-    user.email = body.email
-    user.username = body.username
-    if body.new_password:
-        user.hashed_password = get_password_hash(body.new_password)
+    hashed_password = (
+        await get_password_hash(body.new_password) if body.new_password else None
+    )
+    try:
+        controller.update_user(user, body.username, body.email, hashed_password)
+    except EmailAlreadyInUse as exp:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST, "Email already in use"
+        ) from exp
+    except UsernameAlreadyInUse as exp:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST, "Username already in use"
+        ) from exp
     return user.to_dict()
 
 
@@ -58,5 +70,23 @@ async def get_user_avatar_info(user: Annotated[User, Depends(get_user_from_path)
 
 
 @router.get("/{user_id}/avatar/data")
-async def get_user_avatar_data(user: Annotated[User, Depends(get_user_from_path)]):
-    return Response(user.avatar.data.getvalue(), media_type=user.avatar.content_type)
+async def get_user_avatar_data(
+    user: Annotated[User, Depends(get_user_from_path)],
+    request: Request,
+    size: int = AVATAR_FULL_SIZE,
+):
+    if size not in AVATAR_SIZES:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid avatar size")
+    etag = f'"{user.avatar.get_etag(size)}"'
+    headers = {
+        "etag": etag,
+        "cache-control": "public, max-age=31536000, immutable",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        await user.avatar.get_data(size),
+        media_type=user.avatar.content_type,
+        headers=headers,
+    )
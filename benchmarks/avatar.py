@@ -0,0 +1,56 @@
+import asyncio
+import os
+import time
+from threading import Event
+
+from benchmarks.environment import configure
+
+configure()
+
+from app.internal.avatar import prerender_avatars
+from app.internal.user import User
+
+USER_COUNT = 2000
+
+FETCH_COUNT = 200
+
+PRERENDER_WORKERS = os.cpu_count() or 1
+
+
+def report(name: str, count: int, elapsed: float) -> None:
+    print(f"{name:24} {count:6} in {elapsed * 1000:9.1f} ms ({count / elapsed:9.1f}/s)")
+
+
+async def fetch(users: list[User]) -> None:
+    for user in users:
+        await user.avatar.get_data()
+
+
+def main() -> None:
+    start = time.perf_counter()
+    users = [
+        User(f"user{index}", f"user{index}@example.com", "hash")
+        for index in range(USER_COUNT)
+    ]
+    report("create users", USER_COUNT, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    asyncio.run(fetch(users[:FETCH_COUNT]))
+    report("first fetch (render)", FETCH_COUNT, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    asyncio.run(fetch(users[:FETCH_COUNT]))
+    report("repeat fetch (cache)", FETCH_COUNT, time.perf_counter() - start)
+
+    avatar_ids = [user.avatar.id for user in users[FETCH_COUNT:]]
+    start = time.perf_counter()
+    count = prerender_avatars(avatar_ids, PRERENDER_WORKERS, Event())
+    report("prerender", count, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    count = prerender_avatars(avatar_ids, PRERENDER_WORKERS, Event())
+    report("prerender (on disk)", count, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+BENCHMARK_PATH = tempfile.mkdtemp(prefix="classroom-benchmark-")
+
+
+def configure(**overrides: str) -> None:
+    defaults = {
+        "JWT_SECRET_KEY": "benchmark",
+        "ALGORITHM": "HS256",
+        "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+        "CLASSROOM_CODE_LENGTH": "8",
+        "ATTACHMENTS_STORAGE_PATH": os.path.join(BENCHMARK_PATH, "attachments"),
+        "BANNER_IMAGES_STORAGE_PATH": "app/static/banner-images",
+        "AVATAR_IMAGES_STORAGE_PATH": os.path.join(BENCHMARK_PATH, "avatars"),
+        "THEME_COLORS": '["#1967d2", "#1e8e3e", "#e52592", "#e8710a", '
+        '"#129eaf", "#9334e6", "#4285f4", "#5f6368"]',
+        "STORAGE_PATH": os.path.join(BENCHMARK_PATH, "storage"),
+    }
+    for key, value in {**defaults, **overrides}.items():
+        os.environ.setdefault(key, value)
+    for key in ("ATTACHMENTS_STORAGE_PATH", "AVATAR_IMAGES_STORAGE_PATH"):
+        os.makedirs(os.environ[key], exist_ok=True)
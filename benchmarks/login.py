@@ -0,0 +1,107 @@
+import asyncio
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.environment import configure
+
+configure()
+
+LOGIN_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+PORT = 8766
+
+BASE_URL = f"http://127.0.0.1:{PORT}"
+
+PASSWORD = "benchmark-password"
+
+
+async def wait_until_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(100):
+        try:
+            (await client.get("/")).raise_for_status()
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+async def sample_latencies(
+    client: httpx.AsyncClient, token: str, logins: asyncio.Future
+) -> list[float]:
+    latencies: list[float] = []
+    while not logins.done():
+        start = time.perf_counter()
+        response = await client.get(
+            "/users/@me", headers={"Authorization": f"Bearer {token}"}
+        )
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def login(client: httpx.AsyncClient) -> int:
+    response = await client.post(
+        "/auth/login", data={"username": "benchmark", "password": PASSWORD}
+    )
+    return response.status_code
+
+
+async def run() -> None:
+    limits = httpx.Limits(max_connections=LOGIN_COUNT + 1)
+    async with httpx.AsyncClient(
+        base_url=BASE_URL, limits=limits, timeout=120
+    ) as client:
+        await wait_until_ready(client)
+        response = await client.post(
+            "/auth/register",
+            json={
+                "username": "benchmark",
+                "email": "benchmark@example.com",
+                "password": PASSWORD,
+            },
+        )
+        response.raise_for_status()
+        token = response.json()["access_token"]
+        start = time.perf_counter()
+        logins = asyncio.gather(*(login(client) for _ in range(LOGIN_COUNT)))
+        latencies = sorted(await sample_latencies(client, token, logins))
+        elapsed = time.perf_counter() - start
+        status_codes = logins.result()
+    print(
+        f"{LOGIN_COUNT} logins in {elapsed:.1f} s:"
+        f" {status_codes.count(200)} succeeded,"
+        f" {status_codes.count(503)} rejected as busy"
+    )
+    print(
+        f"GET /users/@me during logins: {len(latencies)} requests,"
+        f" p50 {latencies[len(latencies) // 2] * 1000:.1f} ms,"
+        f" p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms,"
+        f" max {latencies[-1] * 1000:.1f} ms"
+    )
+
+
+def main() -> None:
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(PORT),
+            "--log-level",
+            "warning",
+        ]
+    )
+    try:
+        asyncio.run(run())
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
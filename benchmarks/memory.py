@@ -0,0 +1,45 @@
+import gc
+import tracemalloc
+from typing import Callable
+
+from benchmarks.environment import configure
+
+configure()
+
+from app.internal.attachment import Attachment
+from app.internal.comment import Comment
+from app.internal.items import Announcement, Assignment
+from app.internal.submission import Submission
+from app.internal.topic import Topic
+from app.internal.user import User
+
+OBJECT_COUNT = 50000
+
+
+def measure(name: str, factory: Callable[[int], object]) -> None:
+    gc.collect()
+    tracemalloc.start()
+    objects = [factory(index) for index in range(OBJECT_COUNT)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:12} {size / len(objects):8.1f} bytes/object")
+
+
+def main() -> None:
+    owner = User("owner", "owner@example.com", "hash")
+    measure("User", lambda i: User(f"user{i}", f"user{i}@example.com", "hash"))
+    measure("Comment", lambda i: Comment(owner, "hello"))
+    measure("Submission", lambda i: Submission(owner, []))
+    measure("Topic", lambda i: Topic("topic"))
+    measure(
+        "Attachment",
+        lambda i: Attachment("a.txt", "text/plain", owner, "0" * 64, 1),
+    )
+    measure("Announcement", lambda i: Announcement([], None, "text"))
+    measure(
+        "Assignment", lambda i: Assignment(None, [], None, "title", None, None, 1)
+    )
+
+
+if __name__ == "__main__":
+    main()
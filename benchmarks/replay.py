@@ -0,0 +1,76 @@
+import os
+import pickle
+import sys
+import time
+import zlib
+from pathlib import Path
+
+from benchmarks.environment import BENCHMARK_PATH, configure
+
+configure()
+
+from app.internal.classroom import Classroom
+from app.internal.storage import (
+    RECORD_HEADER,
+    LogStorage,
+    dump_object,
+    get_storage_key,
+)
+from app.internal.user import User
+
+RECORD_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+USER_COUNT = 10000
+
+CLASSROOM_COUNT = 1000
+
+
+def write_log(path: Path) -> int:
+    users = [
+        User(f"user{index}", f"user{index}@example.com", "hash")
+        for index in range(USER_COUNT)
+    ]
+    classrooms = [
+        Classroom(users[index % USER_COUNT], f"Classroom {index}", None, None, None)
+        for index in range(CLASSROOM_COUNT)
+    ]
+    objects: list[object] = [*users, *classrooms]
+    while len(objects) < RECORD_COUNT:
+        classroom = classrooms[len(objects) % CLASSROOM_COUNT]
+        objects.append(classroom.create_announcement([], None, "Announcement"))
+    LogStorage(path, RECORD_COUNT).close()
+    with open(path / "log", "ab") as log_file:
+        for obj in objects:
+            data = pickle.dumps(
+                (get_storage_key(obj), dump_object(obj)), pickle.HIGHEST_PROTOCOL
+            )
+            log_file.write(RECORD_HEADER.pack(len(data), zlib.crc32(data)))
+            log_file.write(data)
+    return os.path.getsize(path / "log")
+
+
+def replay(path: Path) -> int:
+    storage = LogStorage(path, RECORD_COUNT)
+    objects = storage.load()
+    storage.close()
+    return len(objects)
+
+
+def main() -> None:
+    path = Path(BENCHMARK_PATH) / "replay"
+    log_size = write_log(path)
+    print(f"log: {RECORD_COUNT} records, {log_size / 1024 / 1024:.1f} MiB")
+
+    start = time.perf_counter()
+    object_count = replay(path)
+    elapsed = time.perf_counter() - start
+    print(f"replay log and compact   {elapsed:7.2f} s ({object_count} root objects)")
+
+    start = time.perf_counter()
+    object_count = replay(path)
+    elapsed = time.perf_counter() - start
+    print(f"load snapshot            {elapsed:7.2f} s ({object_count} root objects)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.environment import configure
+
+configure()
+
+from fastapi.testclient import TestClient
+
+from app.dependencies.authentication import create_access_token
+from app.internal.controller import controller
+from app.main import app
+
+CLASSROOM_COUNT = 5
+
+ITEM_COUNT = 400
+
+COMMENT_COUNT = 3
+
+STUDENT_COUNT = 30
+
+DURATION = 3
+
+
+def seed() -> tuple[str, dict[str, str], dict[str, str]]:
+    owner, student, *others = controller.create_users(
+        [
+            ("owner", "owner@example.com", "hash"),
+            ("student", "student@example.com", "hash"),
+        ]
+        + [
+            (f"student{index}", f"student{index}@example.com", "hash")
+            for index in range(STUDENT_COUNT)
+        ]
+    )
+    classroom_ids = []
+    for classroom_index in range(CLASSROOM_COUNT):
+        classroom = controller.create_classroom(
+            owner, f"Classroom {classroom_index}", None, None, None
+        )
+        controller.add_students_to_classroom(classroom, [student, *others])
+        topic = classroom.create_topic("Topic")
+        for index in range(ITEM_COUNT):
+            due_date = datetime.now() + timedelta(hours=index - ITEM_COUNT // 2)
+            if index % 4 == 0:
+                item = classroom.create_announcement([], None, f"Announcement {index}")
+            elif index % 4 == 1:
+                item = classroom.create_material(
+                    topic, [], None, f"Material {index}", "Description"
+                )
+            elif index % 4 == 2:
+                item = classroom.create_assignment(
+                    topic, [], None, f"Assignment {index}", "Description", due_date, 10
+                )
+            else:
+                item = classroom.create_question(
+                    None, [], None, f"Question {index}", "Description", due_date, 5
+                )
+            for comment_index in range(COMMENT_COUNT):
+                item.create_comment(
+                    others[(index + comment_index) % STUDENT_COUNT], "Comment"
+                )
+        classroom_ids.append(classroom.id)
+    return (
+        classroom_ids[0],
+        {"Authorization": f"Bearer {create_access_token(data={'id': owner.id})}"},
+        {"Authorization": f"Bearer {create_access_token(data={'id': student.id})}"},
+    )
+
+
+def main() -> None:
+    classroom_id, owner_headers, student_headers = seed()
+    client = TestClient(app)
+    cases = [
+        ("GET /classrooms/{id}", f"/classrooms/{classroom_id}", student_headers),
+        (
+            "GET /classrooms/{id}/items?limit=100",
+            f"/classrooms/{classroom_id}/items?limit=100",
+            student_headers,
+        ),
+        ("GET /classrooms", "/classrooms", student_headers),
+        (
+            "GET /tasks/@me?task_type=ToDo",
+            "/tasks/@me?task_type=ToDo",
+            student_headers,
+        ),
+        (
+            "GET /tasks/@me?task_type=ToReview",
+            "/tasks/@me?task_type=ToReview",
+            owner_headers,
+        ),
+    ]
+    for name, url, headers in cases:
+        response = client.get(url, headers=headers)
+        response.raise_for_status()
+        request_count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < DURATION:
+            client.get(url, headers=headers)
+            request_count += 1
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:40} {request_count / elapsed:8.1f} req/s"
+            f" {len(response.content):9} bytes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import time
+from typing import Callable
+
+from benchmarks.environment import configure
+
+configure()
+
+from app.internal.controller import controller
+from app.internal.fragment_cache import fragment_cache
+
+ITEM_COUNT = 2000
+
+COMMENT_COUNT = 3
+
+STUDENT_COUNT = 30
+
+REPEAT = 20
+
+
+def measure(name: str, prepare: Callable[[], None], run: Callable[[], bytes]) -> None:
+    elapsed = 0.0
+    for _ in range(REPEAT):
+        prepare()
+        start = time.perf_counter()
+        run()
+        elapsed += time.perf_counter() - start
+    print(f"{name:28} {elapsed / REPEAT * 1000:8.2f} ms/call")
+
+
+def main() -> None:
+    owner, *students = controller.create_users(
+        [("owner", "owner@example.com", "hash")]
+        + [
+            (f"student{index}", f"student{index}@example.com", "hash")
+            for index in range(STUDENT_COUNT)
+        ]
+    )
+    classroom = controller.create_classroom(owner, "Classroom", None, None, None)
+    controller.add_students_to_classroom(classroom, students)
+    for index in range(ITEM_COUNT):
+        item = classroom.create_assignment(
+            None, [], None, f"Assignment {index}", "Description", None, 10
+        )
+        for comment_index in range(COMMENT_COUNT):
+            item.create_comment(
+                students[(index + comment_index) % STUDENT_COUNT], "Comment"
+            )
+    items = classroom.items
+
+    def drop_all() -> None:
+        fragment_cache.invalidate(classroom)
+        for item in items:
+            fragment_cache.invalidate(item)
+
+    def rename_student() -> None:
+        students[0].username = f"student0-{time.perf_counter_ns()}"
+
+    def render() -> bytes:
+        return classroom.to_json(include_lists=True)
+
+    render()
+    measure("uncached", drop_all, render)
+    measure("cached", lambda: None, render)
+    measure("after one student changes", rename_student, render)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import time
+
+from benchmarks.environment import BENCHMARK_PATH, configure
+
+configure(STORAGE_BACKEND="log", STORAGE_PATH=os.path.join(BENCHMARK_PATH, "log"))
+
+from app.internal.controller import controller
+from app.internal.storage import dump_object
+
+ITEM_COUNT = 2000
+
+STUDENT_COUNT = 300
+
+
+def main() -> None:
+    owner, *students = controller.create_users(
+        [("owner", "owner@example.com", "hash")]
+        + [
+            (f"student{index}", f"student{index}@example.com", "hash")
+            for index in range(STUDENT_COUNT)
+        ]
+    )
+    classroom = controller.create_classroom(owner, "Classroom", None, None, None)
+    controller.add_students_to_classroom(classroom, students)
+    elapsed = 0.0
+    for index in range(ITEM_COUNT):
+        item = classroom.create_assignment(
+            None, [], None, f"Assignment {index}", "Description", None, 10
+        )
+        start = time.perf_counter()
+        controller.save(item)
+        elapsed += time.perf_counter() - start
+    print(f"Controller.save(item)    {elapsed / ITEM_COUNT * 1000000:8.1f} us/call")
+
+    start = time.perf_counter()
+    controller.close()
+    print(f"Controller.close()       {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    item_sizes = [len(dump_object(item)) for item in classroom.items]
+    print(f"classroom record         {len(dump_object(classroom)) / 1024:8.1f} KB")
+    print(f"item record              {sum(item_sizes) / len(item_sizes):8.1f} bytes")
+
+
+if __name__ == "__main__":
+    main()
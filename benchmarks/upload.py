@@ -0,0 +1,114 @@
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.environment import BENCHMARK_PATH, configure
+
+configure()
+
+FILE_SIZE_MB = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+
+CHUNK_SIZE = 1048576
+
+PORT = 8767
+
+
+def read_memory_kb(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status", encoding="utf-8") as status_file:
+        for line in status_file:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    raise RuntimeError(f"{field} not found")
+
+
+def reset_peak_memory(pid: int) -> None:
+    with open(f"/proc/{pid}/clear_refs", "w", encoding="utf-8") as clear_refs:
+        clear_refs.write("5")
+
+
+def wait_until_ready(client: httpx.Client) -> None:
+    for _ in range(100):
+        try:
+            client.get("/").raise_for_status()
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def write_file(path: str) -> None:
+    chunk = os.urandom(CHUNK_SIZE)
+    with open(path, "wb") as upload_file:
+        for _ in range(FILE_SIZE_MB):
+            upload_file.write(chunk)
+
+
+def report(name: str, pid: int, elapsed: float) -> None:
+    print(
+        f"{name:10} {FILE_SIZE_MB / elapsed:8.1f} MB/s,"
+        f" peak RSS {read_memory_kb(pid, 'VmHWM') / 1024:8.1f} MB"
+    )
+
+
+def run(client: httpx.Client, pid: int) -> None:
+    wait_until_ready(client)
+    response = client.post(
+        "/auth/register",
+        json={
+            "username": "benchmark",
+            "email": "benchmark@example.com",
+            "password": "benchmark-password",
+        },
+    )
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    path = os.path.join(BENCHMARK_PATH, "upload.bin")
+    write_file(path)
+    print(f"{'idle':30} RSS {read_memory_kb(pid, 'VmRSS') / 1024:8.1f} MB")
+
+    reset_peak_memory(pid)
+    start = time.perf_counter()
+    with open(path, "rb") as upload_file:
+        response = client.post(
+            "/attachments",
+            files={"file": ("upload.bin", upload_file, "application/octet-stream")},
+        )
+    response.raise_for_status()
+    report("upload", pid, time.perf_counter() - start)
+
+    reset_peak_memory(pid)
+    start = time.perf_counter()
+    with client.stream("GET", f"/attachments/{response.json()['id']}/data") as data:
+        data.raise_for_status()
+        for _ in data.iter_bytes(CHUNK_SIZE):
+            pass
+    report("download", pid, time.perf_counter() - start)
+    os.remove(path)
+
+
+def main() -> None:
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(PORT),
+            "--log-level",
+            "warning",
+        ]
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{PORT}", timeout=600) as client:
+            run(client, server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
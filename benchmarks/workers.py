@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+from benchmarks.environment import BENCHMARK_PATH, configure
+
+configure(STORAGE_BACKEND="sqlite", STORAGE_PATH=os.path.join(BENCHMARK_PATH, "sqlite"))
+
+from app.dependencies.authentication import create_access_token
+from app.internal.controller import controller
+
+MAX_WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+
+CLIENTS_PER_WORKER = 2
+
+DURATION = 10
+
+ITEM_COUNT = 400
+
+COMMENT_COUNT = 3
+
+STUDENT_COUNT = 30
+
+PORT = 8765
+
+
+def seed() -> tuple[str, str]:
+    owner, *students = controller.create_users(
+        [("owner", "owner@example.com", "hash")]
+        + [
+            (f"student{index}", f"student{index}@example.com", "hash")
+            for index in range(STUDENT_COUNT)
+        ]
+    )
+    classroom = controller.create_classroom(owner, "Classroom", None, None, None)
+    controller.add_students_to_classroom(classroom, students)
+    topic = classroom.create_topic("Topic")
+    items = []
+    for index in range(ITEM_COUNT):
+        item = classroom.create_assignment(
+            topic, [], None, f"Assignment {index}", "Description", None, 10
+        )
+        for comment_index in range(COMMENT_COUNT):
+            item.create_comment(
+                students[(index + comment_index) % STUDENT_COUNT], "Comment"
+            )
+        items.append(item)
+    controller.save(topic, classroom, *items)
+    controller.close()
+    return classroom.id, create_access_token(data={"id": students[0].id})
+
+
+def run_client(url: str, token: str, deadline: float) -> int:
+    request_count = 0
+    with httpx.Client(headers={"Authorization": f"Bearer {token}"}) as client:
+        while time.time() < deadline:
+            client.get(url).raise_for_status()
+            request_count += 1
+    return request_count
+
+
+def wait_until_ready(server: subprocess.Popen) -> None:
+    while server.poll() is None:
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/").raise_for_status()
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError("Server exited during startup")
+
+
+def measure(worker_count: int, classroom_id: str, token: str) -> float:
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(PORT),
+            "--workers",
+            str(worker_count),
+            "--log-level",
+            "warning",
+        ]
+    )
+    try:
+        wait_until_ready(server)
+        url = f"http://127.0.0.1:{PORT}/classrooms/{classroom_id}"
+        client_count = worker_count * CLIENTS_PER_WORKER
+        for _ in range(client_count * 4):
+            httpx.get(url, headers={"Authorization": f"Bearer {token}"})
+        with ProcessPoolExecutor(client_count) as executor:
+            deadline = time.time() + DURATION
+            request_counts = executor.map(
+                run_client,
+                [url] * client_count,
+                [token] * client_count,
+                [deadline] * client_count,
+            )
+            return sum(request_counts) / DURATION
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    classroom_id, token = seed()
+    print(f"GET /classrooms/{{id}}, {os.cpu_count()} CPUs")
+    for worker_count in range(1, MAX_WORKERS + 1):
+        throughput = measure(worker_count, classroom_id, token)
+        print(f"{worker_count} workers {throughput:10.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
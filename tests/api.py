@@ -0,0 +1,54 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.dependencies.authentication import create_access_token
+from app.internal.controller import controller
+from app.internal.user import User
+from app.main import app
+
+client = TestClient(app)
+
+ITEM_FIELDS = {
+    "topic_id": None,
+    "attachments_id": [],
+    "assigned_to_students_id": None,
+    "title": None,
+    "description": None,
+    "announcement_text": None,
+    "due_date": None,
+    "point": None,
+    "choices": None,
+}
+
+
+def create_user() -> tuple[User, dict[str, str]]:
+    username = uuid4().hex[:16]
+    user = controller.create_user(username, f"{username}@example.com", "hash")
+    return user, {"Authorization": f"Bearer {create_access_token({'id': user.id})}"}
+
+
+def create_classroom(headers: dict[str, str], *students: User) -> str:
+    response = client.post(
+        "/classrooms",
+        json={"name": "Classroom", "section": None, "subject": None, "room": None},
+        headers=headers,
+    )
+    classroom_id = response.json()["id"]
+    for student in students:
+        client.put(
+            f"/classrooms/{classroom_id}",
+            json={"email": student.email},
+            headers=headers,
+        )
+    return classroom_id
+
+
+def create_item(classroom_id: str, headers: dict[str, str], **fields) -> dict:
+    response = client.post(
+        f"/classrooms/{classroom_id}/items",
+        json={**ITEM_FIELDS, **fields},
+        headers=headers,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
@@ -0,0 +1,19 @@
+import os
+import tempfile
+
+TEST_PATH = tempfile.mkdtemp(prefix="classroom-test-")
+
+os.environ.setdefault("JWT_SECRET_KEY", "test")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+os.environ.setdefault("CLASSROOM_CODE_LENGTH", "8")
+os.environ.setdefault(
+    "ATTACHMENTS_STORAGE_PATH", os.path.join(TEST_PATH, "attachments")
+)
+os.environ.setdefault("BANNER_IMAGES_STORAGE_PATH", "app/static/banner-images")
+os.environ.setdefault("AVATAR_IMAGES_STORAGE_PATH", os.path.join(TEST_PATH, "avatars"))
+os.environ.setdefault(
+    "THEME_COLORS",
+    '["#1967d2", "#1e8e3e", "#e52592", "#e8710a", '
+    '"#129eaf", "#9334e6", "#4285f4", "#5f6368"]',
+)
@@ -0,0 +1,151 @@
+from app.internal.controller import controller
+from tests.api import client, create_classroom, create_item, create_user
+
+
+def get_items(classroom_id: str, headers: dict[str, str], **params) -> dict:
+    response = client.get(
+        f"/classrooms/{classroom_id}/items", params=params, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def get_all_item_ids(classroom_id: str, headers: dict[str, str], **params) -> list:
+    item_ids = []
+    cursor = None
+    while True:
+        page = get_items(
+            classroom_id, headers, **params, **({"cursor": cursor} if cursor else {})
+        )
+        item_ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return item_ids
+
+
+def test_items_are_paged_newest_first() -> None:
+    _, headers = create_user()
+    classroom_id = create_classroom(headers)
+    item_ids = [
+        create_item(
+            classroom_id, headers, type="Announcement", announcement_text=str(index)
+        )["id"]
+        for index in range(5)
+    ]
+
+    first_page = get_items(classroom_id, headers, limit=2)
+    second_page = get_items(
+        classroom_id, headers, limit=2, cursor=first_page["next_cursor"]
+    )
+
+    assert [item["id"] for item in first_page["items"]] == item_ids[:2:-1]
+    assert [item["id"] for item in second_page["items"]] == item_ids[2:0:-1]
+    assert get_all_item_ids(classroom_id, headers, limit=2) == item_ids[::-1]
+
+
+def test_paging_continues_after_the_cursor_item_is_deleted() -> None:
+    _, headers = create_user()
+    classroom_id = create_classroom(headers)
+    item_ids = [
+        create_item(
+            classroom_id, headers, type="Announcement", announcement_text=str(index)
+        )["id"]
+        for index in range(4)
+    ]
+    first_page = get_items(classroom_id, headers, limit=2)
+
+    client.delete(f"/classrooms/{classroom_id}/items/{item_ids[2]}", headers=headers)
+    second_page = get_items(
+        classroom_id, headers, limit=2, cursor=first_page["next_cursor"]
+    )
+
+    assert [item["id"] for item in second_page["items"]] == item_ids[1::-1]
+    assert second_page["next_cursor"] is None
+
+
+def test_items_are_filtered_by_type_and_topic() -> None:
+    _, headers = create_user()
+    classroom_id = create_classroom(headers)
+    topic = client.post(
+        f"/classrooms/{classroom_id}/topics", json={"name": "Topic"}, headers=headers
+    ).json()
+    create_item(classroom_id, headers, type="Announcement", announcement_text="Hi")
+    material = create_item(classroom_id, headers, type="Material", title="Material")
+    assignment = create_item(
+        classroom_id, headers, type="Assignment", title="Work", topic_id=topic["id"]
+    )
+
+    assert get_all_item_ids(classroom_id, headers, item_type="Material") == [
+        material["id"]
+    ]
+    assert get_all_item_ids(classroom_id, headers, topic_id=topic["id"]) == [
+        assignment["id"]
+    ]
+
+
+def test_invalid_cursor_is_rejected() -> None:
+    _, headers = create_user()
+    classroom_id = create_classroom(headers)
+
+    response = client.get(
+        f"/classrooms/{classroom_id}/items", params={"cursor": "x"}, headers=headers
+    )
+
+    assert response.status_code == 400
+
+
+def test_assigned_items_are_visible_only_to_their_students() -> None:
+    alice, alice_headers = create_user()
+    bob, bob_headers = create_user()
+    _, owner_headers = create_user()
+    classroom_id = create_classroom(owner_headers, alice, bob)
+    everyone = create_item(
+        classroom_id, owner_headers, type="Announcement", announcement_text="All"
+    )
+    assigned = create_item(
+        classroom_id,
+        owner_headers,
+        type="Material",
+        title="Alice only",
+        assigned_to_students_id=[alice.id],
+    )
+    item_path = f"/classrooms/{classroom_id}/items/{assigned['id']}"
+
+    assert get_all_item_ids(classroom_id, owner_headers) == [
+        assigned["id"],
+        everyone["id"],
+    ]
+    assert get_all_item_ids(classroom_id, alice_headers) == [
+        assigned["id"],
+        everyone["id"],
+    ]
+    assert get_all_item_ids(classroom_id, bob_headers) == [everyone["id"]]
+    assert client.get(item_path, headers=alice_headers).status_code == 200
+    assert client.get(item_path, headers=bob_headers).status_code == 404
+
+
+def test_reassigned_items_move_between_students() -> None:
+    alice, alice_headers = create_user()
+    bob, bob_headers = create_user()
+    _, owner_headers = create_user()
+    classroom_id = create_classroom(owner_headers, alice, bob)
+    assigned = create_item(
+        classroom_id,
+        owner_headers,
+        type="Material",
+        title="Material",
+        assigned_to_students_id=[alice.id],
+    )
+    classroom = controller.get_classroom_by_id(classroom_id)
+    assert classroom is not None
+    item = classroom.get_item_by_id(assigned["id"])
+    assert item is not None
+
+    classroom.set_item_assigned_to_students(item, [bob])
+
+    assert get_all_item_ids(classroom_id, alice_headers) == []
+    assert get_all_item_ids(classroom_id, bob_headers) == [assigned["id"]]
+
+    classroom.set_item_assigned_to_students(item, None)
+
+    assert get_all_item_ids(classroom_id, alice_headers) == [assigned["id"]]
@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.internal.file_response import create_file_response, parse_range
+
+CONTENT = bytes(range(100))
+
+
+@pytest.fixture
+def client(tmp_path: Path) -> TestClient:
+    path = tmp_path / "file.bin"
+    path.write_bytes(CONTENT)
+    app = FastAPI()
+
+    @app.get("/file")
+    async def get_file(request: Request):
+        return await create_file_response(
+            request, str(path), "application/octet-stream", "file"
+        )
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    ("header", "byte_range"),
+    [
+        ("bytes=0-9", (0, 9)),
+        ("bytes=90-", (90, 99)),
+        ("bytes=5-200", (5, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=-200", (0, 99)),
+        ("bytes=100-", None),
+        ("bytes=-0", None),
+    ],
+)
+def test_parse_range(header: str, byte_range: tuple[int, int] | None) -> None:
+    assert parse_range(header, len(CONTENT)) == byte_range
+
+
+@pytest.mark.parametrize("header", ["items=0-9", "bytes=0-1,5-6", "bytes=9-0"])
+def test_parse_range_rejects_unsupported_ranges(header: str) -> None:
+    with pytest.raises(ValueError):
+        parse_range(header, len(CONTENT))
+
+
+def test_single_range_is_served_partially(client: TestClient) -> None:
+    response = client.get("/file", headers={"range": "bytes=10-19"})
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 10-19/100"
+    assert response.content == CONTENT[10:20]
+
+
+def test_suffix_range_is_served_partially(client: TestClient) -> None:
+    response = client.get("/file", headers={"range": "bytes=-10"})
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 90-99/100"
+    assert response.content == CONTENT[90:]
+
+
+def test_unsatisfiable_range_is_rejected(client: TestClient) -> None:
+    response = client.get("/file", headers={"range": "bytes=100-"})
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */100"
+
+
+def test_if_range_serves_the_range_only_for_the_current_etag(
+    client: TestClient,
+) -> None:
+    etag = client.get("/file").headers["etag"]
+
+    current = client.get("/file", headers={"range": "bytes=0-9", "if-range": etag})
+    stale = client.get("/file", headers={"range": "bytes=0-9", "if-range": '"old"'})
+
+    assert current.status_code == 206
+    assert current.content == CONTENT[:10]
+    assert stale.status_code == 200
+    assert stale.content == CONTENT
+
+
+def test_matching_etag_is_not_modified(client: TestClient) -> None:
+    etag = client.get("/file").headers["etag"]
+
+    not_modified = client.get("/file", headers={"if-none-match": etag})
+    modified = client.get("/file", headers={"if-none-match": '"old"'})
+
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert modified.status_code == 200
+    assert modified.content == CONTENT
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+
+from app.internal.task import GRADEBOOK_COLUMNS
+from tests.api import client, create_classroom, create_item, create_user
+
+
+def create_graded_classroom() -> tuple[str, dict, dict[str, str], list[dict]]:
+    students = [create_user() for _ in range(3)]
+    _, owner_headers = create_user()
+    classroom_id = create_classroom(owner_headers, *(user for user, _ in students))
+    assignment = create_item(
+        classroom_id, owner_headers, type="Assignment", title="Work", point=10
+    )
+    submissions = [
+        client.post(
+            f"/classrooms/{classroom_id}/items/{assignment['id']}/submissions/@me",
+            json={"attachments_id": []},
+            headers=headers,
+        ).json()
+        for _, headers in students[:2]
+    ]
+    return classroom_id, assignment, owner_headers, submissions
+
+
+def test_submissions_are_graded_in_bulk() -> None:
+    classroom_id, assignment, headers, submissions = create_graded_classroom()
+    path = f"/classrooms/{classroom_id}/items/{assignment['id']}/submissions"
+
+    response = client.put(
+        path,
+        json={"points": {submissions[0]["id"]: 7, submissions[1]["id"]: 9}},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert {
+        submission["id"]: submission["point"] for submission in response.json()
+    } == {submissions[0]["id"]: 7, submissions[1]["id"]: 9}
+    assert {
+        submission["id"]: submission["point"]
+        for submission in client.get(path, headers=headers).json()
+    } == {submissions[0]["id"]: 7, submissions[1]["id"]: 9}
+
+
+def test_bulk_grading_with_an_unknown_submission_changes_nothing() -> None:
+    classroom_id, assignment, headers, submissions = create_graded_classroom()
+    path = f"/classrooms/{classroom_id}/items/{assignment['id']}/submissions"
+
+    response = client.put(
+        path,
+        json={"points": {submissions[0]["id"]: 7, "missing": 9}},
+        headers=headers,
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == [
+        {"submission_id": "missing", "message": "Submission not found"}
+    ]
+    assert [
+        submission["point"] for submission in client.get(path, headers=headers).json()
+    ] == [None, None]
+
+
+def test_gradebook_is_exported_as_csv_and_jsonl() -> None:
+    classroom_id, assignment, headers, submissions = create_graded_classroom()
+    client.put(
+        f"/classrooms/{classroom_id}/items/{assignment['id']}/submissions",
+        json={"points": {submissions[0]["id"]: 7}},
+        headers=headers,
+    )
+    path = f"/classrooms/{classroom_id}/gradebook"
+
+    csv_response = client.get(path, headers=headers)
+    jsonl_response = client.get(path, params={"format": "jsonl"}, headers=headers)
+
+    assert csv_response.status_code == 200
+    assert csv_response.headers["content-type"].startswith("text/csv")
+    reader = csv.DictReader(io.StringIO(csv_response.text))
+    assert reader.fieldnames == GRADEBOOK_COLUMNS
+    csv_rows = list(reader)
+    jsonl_rows = [json.loads(line) for line in jsonl_response.text.splitlines()]
+    assert len(csv_rows) == len(jsonl_rows) == 3
+    assert {row["item_id"] for row in jsonl_rows} == {assignment["id"]}
+    assert [row["point"] for row in jsonl_rows if row["point"] is not None] == [7]
+    assert sorted(row["point"] for row in csv_rows) == ["", "", "7"]
+
+
+def test_gradebook_is_only_exported_to_the_owner() -> None:
+    student, student_headers = create_user()
+    _, owner_headers = create_user()
+    classroom_id = create_classroom(owner_headers, student)
+
+    response = client.get(
+        f"/classrooms/{classroom_id}/gradebook", headers=student_headers
+    )
+
+    assert response.status_code == 403
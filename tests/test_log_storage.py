@@ -0,0 +1,223 @@
+import os
+import pickle
+import zlib
+from pathlib import Path
+
+import pytest
+
+from app.exceptions.storage import UnsupportedStorageFormat
+from app.internal.classroom import Classroom
+from app.internal.items import Announcement
+from app.internal.storage import (
+    RECORD_HEADER,
+    STORAGE_FORMAT_VERSION,
+    LogStorage,
+    dump_object,
+    get_storage_key,
+)
+from app.internal.user import User
+
+
+def pack_record(key: str, payload: bytes | None) -> bytes:
+    data = pickle.dumps((key, payload), pickle.HIGHEST_PROTOCOL)
+    return RECORD_HEADER.pack(len(data), zlib.crc32(data)) + data
+
+
+def user_record(user: User) -> bytes:
+    return pack_record(f"user:{user.id}", dump_object(user))
+
+
+def load_users(path: Path) -> dict[str, User]:
+    storage = LogStorage(path, 10000)
+    users = {obj.id: obj for obj in storage.load() if isinstance(obj, User)}
+    storage.close()
+    return users
+
+
+def test_save_close_and_reload(tmp_path: Path) -> None:
+    alice = User("alice", "alice@example.com", "hash")
+    bob = User("bob", "bob@example.com", "hash")
+    storage = LogStorage(tmp_path, 10000)
+    storage.load()
+    storage.save([alice, bob])
+    storage.delete([bob])
+    alice.username = "alice2"
+    storage.save([alice])
+    storage.close()
+
+    users = load_users(tmp_path)
+
+    assert list(users) == [alice.id]
+    assert users[alice.id].username == "alice2"
+
+
+def test_close_compacts_log_into_snapshot(tmp_path: Path) -> None:
+    storage = LogStorage(tmp_path, 10000)
+    storage.load()
+    storage.save([User("alice", "alice@example.com", "hash")])
+    storage.close()
+
+    assert os.path.getsize(tmp_path / "log") == 0
+    assert len(load_users(tmp_path)) == 1
+
+
+def test_snapshot_interval_compacts_while_running(tmp_path: Path) -> None:
+    storage = LogStorage(tmp_path, 3)
+    storage.load()
+    for index in range(3):
+        storage.save([User(f"user{index}", f"user{index}@example.com", "hash")])
+    storage.save([User("user3", "user3@example.com", "hash")])
+    storage.close()
+
+    assert len(load_users(tmp_path)) == 4
+
+
+def test_replay_log_over_snapshot(tmp_path: Path) -> None:
+    alice = User("alice", "alice@example.com", "hash")
+    storage = LogStorage(tmp_path, 10000)
+    storage.load()
+    storage.save([alice])
+    storage.close()
+    bob = User("bob", "bob@example.com", "hash")
+    alice.username = "alice2"
+    with open(tmp_path / "log", "ab") as log_file:
+        log_file.write(user_record(bob))
+        log_file.write(user_record(alice))
+
+    users = load_users(tmp_path)
+
+    assert set(users) == {alice.id, bob.id}
+    assert users[alice.id].username == "alice2"
+    assert os.path.getsize(tmp_path / "log") == 0
+
+
+def test_torn_tail_is_dropped(tmp_path: Path) -> None:
+    alice = User("alice", "alice@example.com", "hash")
+    bob = User("bob", "bob@example.com", "hash")
+    LogStorage(tmp_path, 10000).close()
+    torn_record = user_record(bob)
+    with open(tmp_path / "log", "ab") as log_file:
+        log_file.write(user_record(alice))
+        log_file.write(torn_record[: len(torn_record) // 2])
+
+    users = load_users(tmp_path)
+
+    assert list(users) == [alice.id]
+    assert load_users(tmp_path).keys() == users.keys()
+
+
+def test_truncated_header_is_dropped(tmp_path: Path) -> None:
+    alice = User("alice", "alice@example.com", "hash")
+    LogStorage(tmp_path, 10000).close()
+    with open(tmp_path / "log", "ab") as log_file:
+        log_file.write(user_record(alice))
+        log_file.write(RECORD_HEADER.pack(100, 0)[:3])
+
+    assert list(load_users(tmp_path)) == [alice.id]
+
+
+def test_corrupt_record_stops_replay(tmp_path: Path) -> None:
+    alice = User("alice", "alice@example.com", "hash")
+    bob = User("bob", "bob@example.com", "hash")
+    carol = User("carol", "carol@example.com", "hash")
+    LogStorage(tmp_path, 10000).close()
+    corrupt_record = bytearray(user_record(bob))
+    corrupt_record[-1] ^= 0xFF
+    with open(tmp_path / "log", "ab") as log_file:
+        log_file.write(user_record(alice))
+        log_file.write(corrupt_record)
+        log_file.write(user_record(carol))
+
+    assert list(load_users(tmp_path)) == [alice.id]
+
+
+def test_torn_tail_is_truncated_before_new_writes(tmp_path: Path) -> None:
+    alice = User("alice", "alice@example.com", "hash")
+    bob = User("bob", "bob@example.com", "hash")
+    LogStorage(tmp_path, 10000).close()
+    with open(tmp_path / "log", "ab") as log_file:
+        log_file.write(user_record(alice)[:-1])
+    storage = LogStorage(tmp_path, 10000)
+    storage.load()
+    storage.save([bob])
+    storage.close()
+
+    assert list(load_users(tmp_path)) == [bob.id]
+
+
+def test_classroom_items_are_stored_separately(tmp_path: Path) -> None:
+    owner = User("owner", "owner@example.com", "hash")
+    classroom = Classroom(owner, "Classroom", None, None, None)
+    announcement = classroom.create_announcement([], None, "Hello")
+    storage = LogStorage(tmp_path, 10000)
+    storage.load()
+    storage.save([owner, classroom, announcement])
+    storage.close()
+
+    storage = LogStorage(tmp_path, 10000)
+    objects = {get_storage_key(obj): obj for obj in storage.load()}
+    storage.close()
+
+    item = objects[f"item:{announcement.id}"]
+    stored_classroom = objects[f"classroom:{classroom.id}"]
+    assert isinstance(item, Announcement)
+    assert isinstance(stored_classroom, Classroom)
+    assert item.classroom_id == classroom.id
+    assert item.announcement_text == "Hello"
+    assert stored_classroom.owner is objects[f"user:{owner.id}"]
+
+
+def test_snapshot_records_format_version(tmp_path: Path) -> None:
+    LogStorage(tmp_path, 10000).close()
+
+    with open(tmp_path / "snapshot", "rb") as snapshot_file:
+        format_version, records = pickle.load(snapshot_file)
+
+    assert format_version == STORAGE_FORMAT_VERSION
+    assert records == {}
+
+
+def test_unknown_format_version_is_rejected(tmp_path: Path) -> None:
+    with open(tmp_path / "snapshot", "wb") as snapshot_file:
+        pickle.dump((STORAGE_FORMAT_VERSION + 1, {}), snapshot_file)
+    storage = LogStorage(tmp_path, 10000)
+
+    with pytest.raises(UnsupportedStorageFormat):
+        storage.load()
+    storage.close()
+
+
+def test_save_is_on_disk_when_it_returns(tmp_path: Path) -> None:
+    alice = User("alice", "alice@example.com", "hash")
+    storage = LogStorage(tmp_path, 10000)
+    storage.load()
+    storage.save([alice])
+
+    with open(tmp_path / "log", "rb") as log_file:
+        length, checksum = RECORD_HEADER.unpack(log_file.read(RECORD_HEADER.size))
+        data = log_file.read(length)
+    assert zlib.crc32(data) == checksum
+    assert pickle.loads(data)[0] == f"user:{alice.id}"
+    storage.close()
+
+
+def test_failed_write_is_raised_and_later_writes_succeed(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    alice = User("alice", "alice@example.com", "hash")
+    bob = User("bob", "bob@example.com", "hash")
+    storage = LogStorage(tmp_path, 10000)
+    storage.load()
+    fsync = os.fsync
+
+    def fail_once(fd: int) -> None:
+        monkeypatch.setattr(os, "fsync", fsync)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "fsync", fail_once)
+    with pytest.raises(OSError, match="disk full"):
+        storage.save([alice])
+    storage.save([bob])
+    storage.close()
+
+    assert list(load_users(tmp_path)) == [bob.id]
@@ -0,0 +1,223 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from app.exceptions.storage import StorageConflict
+from app.exceptions.user import EmailAlreadyInUse
+from app.internal.attachment import Attachment
+from app.internal.controller import Controller
+from app.internal.items import SubmissionsMixin
+from app.internal.storage import SQLiteStorage
+
+
+def create_workers(path: Path) -> tuple[Controller, Controller]:
+    first_worker = Controller(SQLiteStorage(path))
+    owner = first_worker.create_user("owner", "owner@example.com", "hash")
+    first_worker.create_user("alice", "alice@example.com", "hash")
+    first_worker.create_user("bob", "bob@example.com", "hash")
+    first_worker.create_classroom(owner, "Classroom", None, None, None)
+    return first_worker, Controller(SQLiteStorage(path))
+
+
+def get_student_names(worker: Controller) -> set[str]:
+    (classroom,) = worker.get_owned_classrooms_for_user(
+        worker.get_user_by_username("owner")  # type: ignore
+    )
+    return {student.username for student in classroom.students}
+
+
+def join(worker: Controller, username: str) -> None:
+    user = worker.get_user_by_username(username)
+    (classroom,) = worker.get_owned_classrooms_for_user(
+        worker.get_user_by_username("owner")  # type: ignore
+    )
+    assert user is not None
+    worker.add_student_to_classroom(classroom, user)
+
+
+def test_stale_save_is_retried_after_refresh(tmp_path: Path) -> None:
+    first_worker, second_worker = create_workers(tmp_path)
+
+    join(first_worker, "alice")
+    join(second_worker, "bob")
+
+    assert get_student_names(second_worker) == {"alice", "bob"}
+    assert get_student_names(Controller(SQLiteStorage(tmp_path))) == {"alice", "bob"}
+    first_worker.refresh()
+    assert get_student_names(first_worker) == {"alice", "bob"}
+    assert [
+        classroom.name
+        for classroom in first_worker.get_classrooms_for_user(
+            first_worker.get_user_by_username("bob")  # type: ignore
+        )
+    ] == ["Classroom"]
+
+
+def test_stale_save_is_rejected(tmp_path: Path) -> None:
+    first_worker, second_worker = create_workers(tmp_path)
+    join(first_worker, "alice")
+    (classroom,) = second_worker.get_owned_classrooms_for_user(
+        second_worker.get_user_by_username("owner")  # type: ignore
+    )
+    classroom.name = "Renamed"
+
+    with pytest.raises(StorageConflict):
+        second_worker.save(classroom)
+
+    second_worker.refresh()
+    assert classroom.name == "Classroom"
+    assert get_student_names(second_worker) == {"alice"}
+
+
+def test_failed_rename_is_rolled_back(tmp_path: Path) -> None:
+    first_worker, second_worker = create_workers(tmp_path)
+    alice = second_worker.get_user_by_username("alice")
+    assert alice is not None
+    first_worker.create_user("carol", "carol@example.com", "hash")
+
+    with pytest.raises(EmailAlreadyInUse):
+        second_worker.update_user(alice, "alice", "carol@example.com", "new hash")
+    with pytest.raises(EmailAlreadyInUse):
+        second_worker.update_user(alice, "alice", "carol@example.com", "new hash")
+
+    assert alice.email == "alice@example.com"
+    assert alice.hashed_password == "hash"
+    assert second_worker.get_user_by_email("alice@example.com") is alice
+    assert second_worker.get_user_by_email("carol@example.com") is not alice
+
+
+def test_items_with_the_same_cursor_are_paged(tmp_path: Path) -> None:
+    first_worker, second_worker = create_workers(tmp_path)
+    workers = (first_worker, second_worker)
+    for worker in workers:
+        (classroom,) = worker.get_owned_classrooms_for_user(
+            worker.get_user_by_username("owner")  # type: ignore
+        )
+        worker.save(classroom.create_announcement([], None, "Announcement"))
+    for worker in workers:
+        worker.refresh()
+
+    for worker in workers:
+        (classroom,) = worker.get_owned_classrooms_for_user(
+            worker.get_user_by_username("owner")  # type: ignore
+        )
+        assert [item.cursor for item in classroom.items] == [1, 1]
+        first_page, cursor = classroom.get_items_page(None, 1)
+        second_page, last_cursor = classroom.get_items_page(cursor, 1)
+        assert last_cursor is None
+        assert {item.id for item in first_page + second_page} == {
+            item.id for item in classroom.items
+        }
+
+
+def count_submission_rows(path: Path) -> int:
+    with sqlite3.connect(path / "classroom.sqlite3") as connection:
+        (count,) = connection.execute(
+            "SELECT COUNT(*) FROM objects WHERE key LIKE 'submission:%'"
+        ).fetchone()
+    return count
+
+
+def test_deleted_items_and_classrooms_remove_their_submissions(
+    tmp_path: Path,
+) -> None:
+    worker, _ = create_workers(tmp_path)
+    owner = worker.get_user_by_username("owner")
+    alice = worker.get_user_by_username("alice")
+    assert owner is not None and alice is not None
+    (classroom,) = worker.get_owned_classrooms_for_user(owner)
+    worker.add_student_to_classroom(classroom, alice)
+    assignments = [
+        classroom.create_assignment(None, [], None, "Assignment", None, None, None)
+        for _ in range(2)
+    ]
+    for assignment in assignments:
+        worker.save(assignment.create_submission(alice, []), assignment)
+    assert count_submission_rows(tmp_path) == 2
+
+    classroom.delete_item(assignments[0])
+    worker.delete(assignments[0])
+    assert count_submission_rows(tmp_path) == 1
+
+    worker.delete_classroom(classroom)
+    assert count_submission_rows(tmp_path) == 0
+
+
+def test_classroom_created_by_another_worker_is_found_by_code(
+    tmp_path: Path,
+) -> None:
+    first_worker, second_worker = create_workers(tmp_path)
+    owner = first_worker.get_user_by_username("owner")
+    assert owner is not None
+    classroom = first_worker.create_classroom(owner, "Second", None, None, None)
+
+    found = second_worker.get_classroom_by_code(classroom.code)
+
+    assert found is not None and found.id == classroom.id
+    assert second_worker.get_classroom_by_code("missing") is None
+
+
+def test_submissions_point_to_their_item_after_load_and_refresh(
+    tmp_path: Path,
+) -> None:
+    first_worker, second_worker = create_workers(tmp_path)
+    owner = first_worker.get_user_by_username("owner")
+    alice = first_worker.get_user_by_username("alice")
+    assert owner is not None and alice is not None
+    (classroom,) = first_worker.get_owned_classrooms_for_user(owner)
+    first_worker.add_student_to_classroom(classroom, alice)
+    assignment = classroom.create_assignment(
+        None, [], None, "Assignment", None, None, None
+    )
+    first_worker.save(assignment.create_submission(alice, []), assignment)
+
+    second_worker.refresh()
+    for worker in (second_worker, Controller(SQLiteStorage(tmp_path))):
+        owner = worker.get_user_by_username("owner")
+        assert owner is not None
+        (classroom,) = worker.get_owned_classrooms_for_user(owner)
+        (item,) = classroom.items
+        assert isinstance(item, SubmissionsMixin)
+        (submission,) = item._submissions.values()
+        assert submission.item is item
+
+
+def test_attachment_references_follow_items_and_submissions(
+    tmp_path: Path,
+) -> None:
+    first_worker, second_worker = create_workers(tmp_path)
+    owner = first_worker.get_user_by_username("owner")
+    alice = first_worker.get_user_by_username("alice")
+    assert owner is not None and alice is not None
+    (classroom,) = first_worker.get_owned_classrooms_for_user(owner)
+    first_worker.add_student_to_classroom(classroom, alice)
+    material = Attachment("material.txt", "text/plain", owner, "material", 1)
+    work = Attachment("work.txt", "text/plain", alice, "work", 1)
+    first_worker.save(material, work)
+    assignment = classroom.create_assignment(
+        None, [material], None, "Assignment", None, None, None
+    )
+    first_worker.save(assignment)
+    first_worker.save(assignment.create_submission(alice, [work]), assignment)
+
+    second_worker.refresh()
+    for worker in (first_worker, second_worker):
+        assert worker.is_attachment_referenced(material)
+        assert worker.is_attachment_referenced(work)
+
+    assignment.attachments = []
+    first_worker.save(assignment.create_submission(alice, []), assignment)
+    second_worker.refresh()
+    for worker in (first_worker, second_worker):
+        assert not worker.is_attachment_referenced(material)
+        assert not worker.is_attachment_referenced(work)
+
+    assignment.attachments = [material]
+    first_worker.save(assignment)
+    second_worker.refresh()
+    classroom.delete_item(assignment)
+    first_worker.delete(assignment)
+    second_worker.refresh()
+    for worker in (first_worker, second_worker):
+        assert not worker.is_attachment_referenced(material)